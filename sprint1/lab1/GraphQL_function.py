@@ -1,4 +1,16 @@
-import os, json, csv, time, datetime, pathlib, urllib.request, urllib.error, random
+import os, json, time, pathlib, random
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson  # encoder em C, opcional
+except ImportError:
+    orjson = None
 
 API = "https://api.github.com/graphql"
 TOKEN = os.environ.get("GITHUB_TOKEN")
@@ -6,51 +18,79 @@ TOKEN = os.environ.get("GITHUB_TOKEN")
 OUT = pathlib.Path("data"); OUT.mkdir(parents=True, exist_ok=True)
 JSON_PATH = OUT / "top100.json"
 CSV_PATH  = OUT / "top100.csv"
+FEATHER_PATH = OUT / "top100.feather"
+OUT_PATHS = (JSON_PATH, CSV_PATH, FEATHER_PATH)
+
+def tmp_path(path: pathlib.Path) -> pathlib.Path:
+    # as paginas vao para um *.tmp; o arquivo final so e substituido no fim
+    return path.with_name(path.name + ".tmp")
 
 QUERY_PATH = pathlib.Path("queryLab1.graphql") 
 
 QUERY = QUERY_PATH.read_text(encoding="utf-8")
 
+# trechos (minusculos) que indicam query pesada demais no GraphQL
+HEAVY_TOKENS = ("timeout", "went wrong while executing your query")
+
+# sessao unica: reaproveita a conexao TCP/TLS entre as paginas
+SESSION = requests.Session()
+SESSION.headers.update({
+    "Authorization": f"Bearer {TOKEN}",
+    "User-Agent": "lab01-graphql-requests/1.0",
+})
+SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
 ##chamada para o graphQL "TESTE"
 def call(query: str, variables: dict, timeout=60) -> dict:
     if not TOKEN:
         raise RuntimeError("Defina GITHUB_TOKEN.")
-    body = json.dumps({"query": query, "variables": variables}).encode("utf-8")
-    headers = {
-        "Authorization": f"Bearer {TOKEN}",
-        "Content-Type": "application/json",
-        "User-Agent": "lab01-graphql-stdlib/1.0",
-        "Connection": "close",
-    }
-    req = urllib.request.Request(API, data=body, headers=headers, method="POST")
-    with urllib.request.urlopen(req, timeout=timeout) as resp:
-        data = json.loads(resp.read().decode("utf-8"))
+    resp = SESSION.post(API, json={"query": query, "variables": variables}, timeout=timeout)
+    resp.raise_for_status()
+    # parse direto dos bytes (sem decodificar para str antes)
+    data = orjson.loads(resp.content) if orjson is not None else json.loads(resp.content)
     if "errors" in data:
         msg = json.dumps(data["errors"], ensure_ascii=False)
-        if "timeout" in msg.lower() or "went wrong while executing your query" in msg.lower():
+        low = msg.lower()
+        if any(t in low for t in HEAVY_TOKENS):
             raise RuntimeError(f"HEAVY_QUERY: {msg[:300]}")
         raise RuntimeError(msg)
     return data["data"]
 
 ##Teste de contorno erro 502
+def backoff(attempt, base=0.1, cap=8.0, retry_after=None):
+    # so dorme no caminho de erro: exponencial com teto + jitter (ou o Retry-After do servidor)
+    if retry_after:
+        try:
+            time.sleep(float(retry_after))
+            return
+        except ValueError:
+            pass
+    delay = min(cap, base * 2 ** attempt)
+    time.sleep(delay + random.uniform(0, delay * 0.2))
+
 def try_fetch(after=None, page_size=100, max_shrinks=5):
     shrinks = 0
+    retries = 0
     cur_size = page_size 
-    base = 0.8 #obs: tempo de espera a cada tentatica
 
     while True:
         try:
-            time.sleep(base + random.uniform(0, 0.25)) 
             data = call(QUERY, {"after": after, "pageSize": cur_size})
             return data, cur_size
-        except urllib.error.HTTPError as e:
-            status = e.code
-            txt = e.read().decode("utf-8", errors="replace") if hasattr(e, "read") else str(e)
+        except requests.HTTPError as e:
+            resp = e.response
+            status = resp.status_code if resp is not None else None
+            txt = resp.text if resp is not None else str(e)
+            if status == 429 and retries < max_shrinks:
+                retries += 1
+                print("[warn] HTTP 429. Aguardando e tentando de novo.")
+                backoff(retries, retry_after=resp.headers.get("Retry-After"))
+                continue
             if status in (502, 503, 504) and shrinks < max_shrinks:
                 shrinks += 1
                 cur_size = [60, 40, 25, 15, 10][min(shrinks-1, 4)]
-                base *= 1.4
                 print(f"[warn] HTTP {status}. Diminuindo pageSize para {cur_size} e tentando de novo.")
+                backoff(shrinks)
                 continue
             raise RuntimeError(f"HTTP {status}: {txt[:400]}")
         except RuntimeError as re:
@@ -58,93 +98,154 @@ def try_fetch(after=None, page_size=100, max_shrinks=5):
             if msg.startswith("HEAVY_QUERY") and shrinks < max_shrinks:
                 shrinks += 1
                 cur_size = [60, 40, 25, 15, 10][min(shrinks-1, 4)]
-                base *= 1.4
                 print(f"[warn] Query pesada. pageSize→{cur_size}.")
+                backoff(shrinks)
                 continue
             raise
 
-def iso_to_dt(s: str | None):
-    if not s: return None
-    return datetime.datetime.fromisoformat(s.replace("Z", "+00:00"))
-
-def normalize(nodes):
-    now = datetime.datetime.now(datetime.timezone.utc)
-    rows = []
-    for r in nodes:
-        created = iso_to_dt(r.get("createdAt"))
-        updated = iso_to_dt(r.get("updatedAt")) or iso_to_dt(r.get("pushedAt"))
-        idade_dias = (now - created).days if created else None
-        dias_ult = (now - updated).days if updated else None
-        issues_total  = (r.get("issues") or {}).get("totalCount", 0)
-        issues_closed = (r.get("closedIssues") or {}).get("totalCount", 0)
-        closed_ratio  = (issues_closed / issues_total) if issues_total else 0.0
-        rows.append({
-            "owner": (r.get("owner") or {}).get("login"),
-            "name": r.get("name"),
-            "url": r.get("url"),
-            "stars": r.get("stargazerCount", 0),
-            "createdAt": r.get("createdAt"),
-            "idade_dias": idade_dias,
-            "updatedAt": r.get("updatedAt") or r.get("pushedAt"),
-            "dias_desde_ultima_atualizacao": dias_ult,
-            "releases": (r.get("releases") or {}).get("totalCount", 0),
-            "prsMerged": (r.get("pullRequests") or {}).get("totalCount", 0),
-            "issuesTotal": issues_total,
-            "issuesClosed": issues_closed,
-            "closedRatio": round(closed_ratio, 4),
-            "primaryLanguage": (r.get("primaryLanguage") or {}).get("name"),
-        })
-    return rows
-
-##FUNC PARA SALVAR CSV
-def save_csv(rows, path: pathlib.Path):
-    cols = ["owner","name","url","stars","createdAt","idade_dias",
+CSV_COLS = ["owner","name","url","stars","createdAt","idade_dias",
             "updatedAt","dias_desde_ultima_atualizacao","releases","prsMerged",
             "issuesTotal","issuesClosed","closedRatio","primaryLanguage"]
-    with path.open("w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=cols); w.writeheader(); w.writerows(rows)
+
+# esquema fixo do CSV (tipos estaveis entre paginas para o writer do Arrow)
+CSV_SCHEMA = pa.schema([
+    ("owner", pa.string()), ("name", pa.string()), ("url", pa.string()),
+    ("stars", pa.int64()), ("createdAt", pa.string()), ("idade_dias", pa.int64()),
+    ("updatedAt", pa.string()), ("dias_desde_ultima_atualizacao", pa.int64()),
+    ("releases", pa.int64()), ("prsMerged", pa.int64()),
+    ("issuesTotal", pa.int64()), ("issuesClosed", pa.int64()),
+    ("closedRatio", pa.float64()), ("primaryLanguage", pa.string()),
+])
+
+CSV_OPTS = pacsv.WriteOptions(include_header=True)
+
+def to_arrow(df: pd.DataFrame) -> pa.Table:
+    return pa.Table.from_pandas(df[CSV_COLS], schema=CSV_SCHEMA, preserve_index=False)
+
+def normalize(nodes) -> pd.DataFrame:
+    # achata os nodes uma vez e calcula as colunas derivadas de forma vetorizada
+    now = pd.Timestamp.now(tz="UTC")
+    df = pd.json_normalize(nodes)
+    if df.empty:
+        return pd.DataFrame(columns=CSV_COLS)
+
+    def col(name, default=None):
+        return df[name] if name in df.columns else pd.Series(default, index=df.index, dtype=object)
+
+    def count(name):
+        return pd.to_numeric(col(name, 0), errors="coerce").fillna(0).astype("int64")
+
+    updated_at = col("updatedAt").fillna(col("pushedAt"))
+    created = pd.to_datetime(col("createdAt"), utc=True, errors="coerce")
+    updated = pd.to_datetime(updated_at, utc=True, errors="coerce")
+    issues_total  = count("issues.totalCount")
+    issues_closed = count("closedIssues.totalCount")
+    closed_ratio  = (issues_closed / issues_total.where(issues_total > 0)).fillna(0.0).round(4)
+
+    return pd.DataFrame({
+        "owner": col("owner.login"),
+        "name": col("name"),
+        "url": col("url"),
+        "stars": count("stargazerCount"),
+        "createdAt": col("createdAt"),
+        "idade_dias": (now - created).dt.days.astype("Int64"),
+        "updatedAt": updated_at,
+        "dias_desde_ultima_atualizacao": (now - updated).dt.days.astype("Int64"),
+        "releases": count("releases.totalCount"),
+        "prsMerged": count("pullRequests.totalCount"),
+        "issuesTotal": issues_total,
+        "issuesClosed": issues_closed,
+        "closedRatio": closed_ratio,
+        "primaryLanguage": col("primaryLanguage.name"),
+    }, columns=CSV_COLS)
+
+def to_records(df: pd.DataFrame) -> list:
+    # tipos nativos do Python e None no lugar de NaN/NA (JSON valido)
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+def to_json(row) -> str:
+    # JSON compacto de uma linha (orjson quando disponivel)
+    if orjson is not None:
+        return orjson.dumps(row).decode("utf-8")
+    return json.dumps(row, ensure_ascii=False, separators=(",", ":"))
 
 ##MAIN 
 def main(target=1000, start_page_size=20):
-    all_nodes = []
-    seen_ids = set()
+    prev_ids = set()
+    total = 0
+    preview = []
     after = None
     page_size = start_page_size
+    pending = None
+
+    # cada pagina e normalizada e gravada assim que chega (memoria constante)
+    # o feather (Arrow IPC) tambem e gravado por pagina e preserva os tipos para o graphs.py
+    # tudo vai para arquivos *.tmp: se alguma pagina falhar, as saidas anteriores ficam intactas
+    try:
+        with pacsv.CSVWriter(str(tmp_path(CSV_PATH)), CSV_SCHEMA, write_options=CSV_OPTS) as wcsv, \
+             pa.ipc.new_file(str(tmp_path(FEATHER_PATH)), CSV_SCHEMA) as wfeather, \
+             tmp_path(JSON_PATH).open("w", encoding="utf-8") as fjson, \
+             ThreadPoolExecutor(max_workers=1) as writer:
+            fjson.write("[")
+
+            def write_page(nodes, first_row):
+                df = normalize(nodes)
+                tbl = to_arrow(df)
+                wcsv.write_table(tbl)
+                wfeather.write_table(tbl)
+                rows = to_records(df)
+                for i, row in enumerate(rows):
+                    fjson.write(("\n  " if first_row + i == 0 else ",\n  ") + to_json(row))
+                fjson.flush()
+                preview.extend(rows[:3 - len(preview)])
+
+            try:
+                while total < target:
+                    data, used_size = try_fetch(after=after, page_size=page_size)
+                    rl = data.get("rateLimit", {})
+                    search = data["search"]
+                    page_nodes = search["nodes"]
+                    print(f"[ok] pageSize={used_size}  got={len(page_nodes)}  remaining={rl.get('remaining')}  resetAt={rl.get('resetAt')}")
+
+                    # trecho para parar de duplicar (e remover excesso)
+                    # o cursor e estavel; so pode haver sobreposicao quando o pageSize
+                    # encolheu no retry, e ai basta comparar com a pagina anterior
+                    if used_size != page_size:
+                        page_nodes = [n for n in page_nodes if n["id"] not in prev_ids]
+                    new_nodes = page_nodes[:target - total]
+                    prev_ids = {n["id"] for n in new_nodes}
+
+                    # grava esta pagina numa thread enquanto a proxima e buscada
+                    if pending is not None:
+                        pending.result()  # propaga erro de escrita e mantem a ordem
+                    pending = writer.submit(write_page, new_nodes, total)
+                    total += len(new_nodes)
+
+                    # trecho para continuar as pags
+                    if total >= target: break
+                    if not search["pageInfo"]["hasNextPage"]:
+                        break
+                    after = search["pageInfo"]["endCursor"]
+                    page_size = used_size  #para manter o tamanho funcional
+            finally:
+                # a escrita da ultima pagina e sempre aguardada e seu erro propagado;
+                # se a busca seguinte tambem falhou, ela fica encadeada no traceback
+                if pending is not None:
+                    pending.result()
+            fjson.write("\n]\n")
+    except BaseException:
+        for path in OUT_PATHS:
+            tmp_path(path).unlink(missing_ok=True)
+        raise
+    # so agora (todas as paginas gravadas) as saidas anteriores sao substituidas
+    for path in OUT_PATHS:
+        os.replace(tmp_path(path), path)
 
-    while len(all_nodes) < target:
-        data, used_size = try_fetch(after=after, page_size=page_size)
-        rl = data.get("rateLimit", {})
-        search = data["search"]
-        page_nodes = search["nodes"]
-        print(f"[ok] pageSize={used_size}  got={len(page_nodes)}  remaining={rl.get('remaining')}  resetAt={rl.get('resetAt')}")
-
-        # trecho para parar de duplicar
-        for n in page_nodes:
-            if n["id"] not in seen_ids:
-                all_nodes.append(n)
-                seen_ids.add(n["id"])
-                if len(all_nodes) >= target:
-                    break
-
-        # trecho para continuar as pags
-        if len(all_nodes) >= target: break
-        if not search["pageInfo"]["hasNextPage"]:
-            break
-        after = search["pageInfo"]["endCursor"]
-        page_size = used_size  #para manter o tamanho funcional
-
-    
-    all_nodes = all_nodes[:target] # removedo excesso
-
-    #convertendo e salvando em 2 arquvos
-    rows = normalize(all_nodes)
-    JSON_PATH.write_text(json.dumps(rows, indent=2, ensure_ascii=False), encoding="utf-8")
-    save_csv(rows, CSV_PATH)
     # teste
-    print(f"[salvo] {len(rows)} linhas em\n  - {JSON_PATH}\n  - {CSV_PATH}")
+    print(f"[salvo] {total} linhas em\n  - {JSON_PATH}\n  - {CSV_PATH}\n  - {FEATHER_PATH}")
 
    # teste
-    print(json.dumps(rows[:3], indent=2, ensure_ascii=False))
+    print(json.dumps(preview, indent=2, ensure_ascii=False))
 
 
 if __name__ == "__main__":
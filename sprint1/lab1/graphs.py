@@ -5,142 +5,160 @@ import random
 from datetime import datetime, timedelta
 import os
 
-def salvar_grafico(nome_arquivo):
+def nova_figura(ax, largura, altura):
+    """Ajusta o tamanho da figura compartilhada (a figura de ax)."""
+    ax.figure.set_size_inches(largura, altura)
+
+def salvar_grafico(ax, nome_arquivo):
     """Salva o gráfico atual em PNG na pasta 'graficos'."""
     pasta = 'graficos'
     os.makedirs(pasta, exist_ok=True)  # Cria a pasta se não existir
     caminho = os.path.join(pasta, f'{nome_arquivo}.png')
-    plt.savefig(caminho, bbox_inches='tight')
-    plt.close()  # Fecha a figura atual para liberar memória
+    ax.figure.savefig(caminho, bbox_inches='tight')
+    ax.clear()  # Limpa o eixo para o proximo grafico (reaproveita a figura)
     print(f'Gráfico salvo em: {caminho}')
 
-def grafico_barra(df, col, line, title, name):
-    plt.figure(figsize=(8, 5))
-    sns.barplot(x=col, y=line, data=df, estimator="median", errorbar=None)
-    plt.title(title)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    salvar_grafico(name)
-    plt.show()
+def grafico_barra(ax, df, col, line, title, name):
+    nova_figura(ax, 8, 5)
+    sns.barplot(x=col, y=line, data=df, estimator="median", errorbar=None, ax=ax)
+    ax.set_title(title)
+    ax.tick_params(axis="x", labelrotation=45)
+    salvar_grafico(ax, name)
     
-def grafico_barra1(contagem, title, name):
-    plt.figure(figsize=(8, 6))
-    sns.barplot(x=contagem.values, y=contagem.index, palette="viridis")
-    plt.title(title)
-    plt.xlabel("Número de repositórios")
-    plt.ylabel("Linguagem")
-    plt.tight_layout()
-    salvar_grafico(name)
+def contagem_linguagens(df):
+    """Contagem de repositorios por linguagem (calculada uma vez no main)."""
+    return (df["primaryLanguage"].astype("category")
+            .cat.add_categories(["Sem linguagem"])
+            .fillna("Sem linguagem").value_counts())
+
+def grafico_barra1(ax, contagem, title, name):
+    nova_figura(ax, 8, 6)
+    sns.barplot(x=contagem.values, y=contagem.index.astype(str), palette="viridis", ax=ax)
+    ax.set_title(title)
+    ax.set_xlabel("Número de repositórios")
+    ax.set_ylabel("Linguagem")
+    salvar_grafico(ax, name)
     
-def grafico_histograma(df,bin, col, title, name, log=False, eixo="x"):
-    #obs o pls.figure cria uma figura vazia, ent qualquer imagem criada cai la dentro, por isso o plt n usa sns e msm tem img do sns dentro dele
-    plt.figure(figsize=(8, 5))
-    sns.histplot(df[col], bins=bin, kde=True)
-    plt.title(title)
+def grafico_histograma(ax, df,bin, col, title, name, log=False, eixo="x"):
+    #obs: todos os graficos desenham no mesmo eixo (ax, criado no main), que e limpo depois de salvar
+    nova_figura(ax, 8, 5)
+    sns.histplot(df[col], bins=bin, kde=True, ax=ax)
+    ax.set_title(title)
     if log:
        if eixo == "x":
-            plt.xscale("log")   
+            ax.set_xscale("log")   
        elif eixo == "y":
-            plt.yscale("log")
+            ax.set_yscale("log")
             
-    plt.tight_layout()
-    salvar_grafico(name)
+    salvar_grafico(ax, name)
     
         
-def grafico_histograma_rq1(df,bin, col, title, name, log=False, eixo="x"):
-    #obs o pls.figure cria uma figura vazia, ent qualquer imagem criada cai la dentro, por isso o plt n usa sns e msm tem img do sns dentro dele
-    plt.figure(figsize=(8, 5))
-    sns.histplot(df[col]/365, bins=bin, kde=True)
-    plt.title(title)
+def grafico_histograma_rq1(ax, idade_anos,bin, title, name, log=False, eixo="x"):
+    #recebe a idade ja convertida em anos (array numpy calculado uma vez no main)
+    nova_figura(ax, 8, 5)
+    sns.histplot(idade_anos, bins=bin, kde=True, ax=ax)
+    ax.set_title(title)
     if log:
        if eixo == "x":
-            plt.xscale("log")   
+            ax.set_xscale("log")   
        elif eixo == "y":
-            plt.yscale("log")
+            ax.set_yscale("log")
             
-    plt.tight_layout()
-    salvar_grafico(name)
+    salvar_grafico(ax, name)
     
     #col = categoria e line = variavel numerica
-def grafico_RQ2(df,col, title, name):
-   plt.figure(figsize=(8,5))
-   sns.histplot(df["prsMerged"], bins=50, log_scale=True, kde=True)
-   plt.title("Distribuição de PRs aceitos (log)")
-   plt.xlabel("PRs aceitos (log)")
-   plt.ylabel("Quantidade de repositórios")
-   plt.tight_layout()
-   salvar_grafico("RQ2")
+def grafico_RQ2(ax, df,col, title, name):
+   nova_figura(ax, 8, 5)
+   sns.histplot(df["prsMerged"], bins=50, log_scale=True, kde=True, ax=ax)
+   ax.set_title("Distribuição de PRs aceitos (log)")
+   ax.set_xlabel("PRs aceitos (log)")
+   ax.set_ylabel("Quantidade de repositórios")
+   salvar_grafico(ax, "RQ2")
     # plt.show()
     
-def grafico_violin(df):
-    plt.figure(figsize=(8, 5))
-    sns.violinplot(x=df["prsMerged"])
-    plt.title('Distribuição dos Lucros por Produto (Violin Plot)')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    salvar_grafico("grafico_violin")
+def grafico_violin(ax, df):
+    nova_figura(ax, 8, 5)
+    sns.violinplot(x=df["prsMerged"], ax=ax)
+    ax.set_title('Distribuição dos Lucros por Produto (Violin Plot)')
+    ax.tick_params(axis="x", labelrotation=45)
+    salvar_grafico(ax, "grafico_violin")
     # plt.show()
    
 # rq7 Contribuições externas 
-def grafico_rq7_prs(df):
-    plt.figure(figsize=(10,6))
-    sns.barplot(x="primaryLanguage", y="prsMerged", data=df, estimator="median")
-    plt.title("RQ7 - PRs aceitos por linguagem")
-    plt.ylabel("Mediana de PRs aceitos")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    salvar_grafico("RQ7_CONT_EXT")
+def grafico_rq7_prs(ax, df):
+    nova_figura(ax, 10, 6)
+    sns.barplot(x="primaryLanguage", y="prsMerged", data=df, estimator="median", ax=ax)
+    ax.set_title("RQ7 - PRs aceitos por linguagem")
+    ax.set_ylabel("Mediana de PRs aceitos")
+    ax.tick_params(axis="x", labelrotation=45)
+    salvar_grafico(ax, "RQ7_CONT_EXT")
 
 # rq70 releses por linguagem
-def grafico_rq7_releases(df):
-    plt.figure(figsize=(10,6))
-    sns.barplot(x="primaryLanguage", y="releases", data=df, estimator="median")
-    plt.title("RQ7 - Releases por linguagem")
-    plt.ylabel("Mediana de releases")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    salvar_grafico("RQ7_RELEASE_L")
+def grafico_rq7_releases(ax, df):
+    nova_figura(ax, 10, 6)
+    sns.barplot(x="primaryLanguage", y="releases", data=df, estimator="median", ax=ax)
+    ax.set_title("RQ7 - Releases por linguagem")
+    ax.set_ylabel("Mediana de releases")
+    ax.tick_params(axis="x", labelrotation=45)
+    salvar_grafico(ax, "RQ7_RELEASE_L")
     
 # rq7 atualização recente / linguagem
-def grafico_rq7_atualizacao(df):
-    plt.figure(figsize=(10,6))
+def grafico_rq7_atualizacao(ax, df):
+    nova_figura(ax, 10, 6)
     sns.barplot(x="primaryLanguage", y="dias_desde_ultima_atualizacao", 
-            data=df, estimator="mean")
-    plt.title("RQ7 - Atualização recente por linguagem")
-    plt.ylabel("Media (dias)")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    salvar_grafico("RQ7_ATT_L")
+            data=df, estimator="mean", ax=ax)
+    ax.set_title("RQ7 - Atualização recente por linguagem")
+    ax.set_ylabel("Media (dias)")
+    ax.tick_params(axis="x", labelrotation=45)
+    salvar_grafico(ax, "RQ7_ATT_L")
 
     
 
 
+# so as colunas usadas nos graficos, ja tipadas (linguagem como categoria)
+COLUNAS = {
+    "stars": "int32",
+    "idade_dias": "float32",
+    "releases": "int32",
+    "dias_desde_ultima_atualizacao": "float32",
+    "closedRatio": "float32",
+    "primaryLanguage": "category",
+    "prsMerged": "int32",
+}
+
 def main():
-    df = pd.read_csv('data/top100.csv')#retorna um dataframe
+    #prefere o feather gerado pelo GraphQL_function.py (tipos preservados, sem parse de texto)
+    if os.path.exists('data/top100.feather'):
+        df = pd.read_feather('data/top100.feather', columns=list(COLUNAS)).astype(COLUNAS)
+    else:
+        df = pd.read_csv('data/top100.csv', usecols=list(COLUNAS), dtype=COLUNAS)#retorna um dataframe
+    # figura unica reaproveitada por todos os graficos (layout resolvido pelo constrained_layout)
+    fig, ax = plt.subplots(figsize=(8, 5), constrained_layout=True)
     #RQ01
-    grafico_histograma_rq1(df, 10, 'idade_dias', 'Idade', "RQ1")
+    idade_anos = df["idade_dias"].to_numpy(dtype="float32") / 365.0
+    grafico_histograma_rq1(ax, idade_anos, 10, 'Idade', "RQ1")
     
     #RQ02 --- melhores a exibição dps
-    grafico_RQ2(df, "prsMerged", "RQ02 - PRs aceitos (log)", "RQ02")
+    grafico_RQ2(ax, df, "prsMerged", "RQ02 - PRs aceitos (log)", "RQ02")
 
     #RQ03
-    grafico_histograma(df, 15, 'releases', 'releases', "RQ3")
+    grafico_histograma(ax, df, 15, 'releases', 'releases', "RQ3")
     
     #RQ04
-    grafico_histograma(df, 30, 'dias_desde_ultima_atualizacao', 'dias desde ultima atualizacao', "RQ4")
+    grafico_histograma(ax, df, 30, 'dias_desde_ultima_atualizacao', 'dias desde ultima atualizacao', "RQ4")
     
     #RQ05
-    contagem = df["primaryLanguage"].fillna("Sem linguagem").value_counts()
-    contagem.head
-    grafico_barra1(contagem, 'linguaguens mais usadas', "RQ5")
+    contagem = contagem_linguagens(df)
+    grafico_barra1(ax, contagem, 'linguaguens mais usadas', "RQ5")
     
     #RQ06
-    grafico_histograma(df, 15, 'closedRatio', 'total issues / issues fechadas', "RQ6")
+    grafico_histograma(ax, df, 15, 'closedRatio', 'total issues / issues fechadas', "RQ6")
 
     #RQ07
-    grafico_rq7_atualizacao(df)
-    grafico_rq7_prs(df)
-    grafico_rq7_releases(df)
+    grafico_rq7_atualizacao(ax, df)
+    grafico_rq7_prs(ax, df)
+    grafico_rq7_releases(ax, df)
+    plt.close(fig)
 
 
 if __name__ == "__main__":
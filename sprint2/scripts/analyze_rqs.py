@@ -3,21 +3,22 @@
 Analyze research questions (RQ01-04) by merging process metrics and CK metrics,
 computing descriptive stats per repo and correlations, and generating optional plots.
 
-Inputs (CSV):
+Inputs (CSV or Parquet; a .parquet next to the .csv is preferred):
 - sprint2/data/repos_list.csv          -> repo, url, stars, created_at, releases, age_years
 - sprint2/data/processed/cloc_summary.csv -> repo, files, code, comment, blank
 - sprint2/data/processed/ck_summary.csv   -> repo, n_classes, cbo_*, dit_*, lcom_*
 
 Outputs:
-- sprint2/data/processed/analysis_summary.csv
-- sprint2/data/processed/correlations.csv (Spearman & Pearson)
+- sprint2/data/processed/analysis_summary.csv (+ .parquet)
+- sprint2/data/processed/correlations.csv (+ .parquet; Spearman & Pearson)
+  (--no_csv writes only the Parquet files)
 - sprint2/data/processed/plots/*.png (if --plots)
 
 Usage:
   python sprint2/scripts/analyze_rqs.py --plots
 """
 import os
-from typing import List
+from typing import Dict, List, Optional
 
 import pandas as pd
 import numpy as np
@@ -27,56 +28,54 @@ def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
+REPOS_DTYPES = {"repo": "string", "stars": "float64", "releases": "float64", "age_years": "float64"}
+CLOC_DTYPES = {"repo": "string", "files": "float64", "code": "float64", "comment": "float64", "blank": "float64"}
+CK_DTYPES = {
+    "repo": "string", "n_classes": "float64",
+    "cbo_mean": "float64", "cbo_median": "float64", "cbo_std": "float64",
+    "dit_mean": "float64", "dit_median": "float64", "dit_std": "float64",
+    "lcom_mean": "float64", "lcom_median": "float64", "lcom_std": "float64",
+}
+
+
+def read_table(path: str, dtypes: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """Read a table, preferring a Parquet sibling of a CSV path when present.
+
+    When ``dtypes`` is given, only those columns are loaded (missing ones are
+    tolerated) and CSV parsing uses the declared types directly.
+    """
+    pq = path if path.endswith(".parquet") else os.path.splitext(path)[0] + ".parquet"
+    if os.path.isfile(pq):
+        df = pd.read_parquet(pq)
+        return df[[c for c in df.columns if c in dtypes]] if dtypes else df
+    if not dtypes:
+        return pd.read_csv(path)
+    return pd.read_csv(path, usecols=lambda c: c in dtypes, dtype=dtypes)
+
+
+def dedup_by_repo(df: pd.DataFrame, key: str) -> pd.DataFrame:
+    """Keep one row per repo: the one with the highest ``key`` (NaN sorts first)."""
+    if "repo" not in df.columns or df.empty:
+        return df
+    if key in df.columns:
+        df = df.sort_values(["repo", key], na_position="first", kind="stable")
+    return df.drop_duplicates(subset=["repo"], keep="last").reset_index(drop=True)
+
+
 def load_inputs(base: str = "sprint2/data"):
     repos_csv = os.path.join(base, "repos_list.csv")
     cloc_csv = os.path.join(base, "processed", "cloc_summary.csv")
     ck_csv = os.path.join(base, "processed", "ck_summary.csv")
-    df_repos = pd.read_csv(repos_csv)
-    df_cloc = pd.read_csv(cloc_csv)
-    df_ck = pd.read_csv(ck_csv)
-
-    # Normalize types
-    for col in ["stars", "releases"]:
-        if col in df_repos.columns:
-            df_repos[col] = pd.to_numeric(df_repos[col], errors="coerce")
-    if "age_years" in df_repos.columns:
-        df_repos["age_years"] = pd.to_numeric(df_repos["age_years"], errors="coerce")
-    for col in ["files", "code", "comment", "blank"]:
-        if col in df_cloc.columns:
-            df_cloc[col] = pd.to_numeric(df_cloc[col], errors="coerce")
-    if "n_classes" in df_ck.columns:
-        df_ck["n_classes"] = pd.to_numeric(df_ck["n_classes"], errors="coerce")
-    for col in [
-        "cbo_mean", "cbo_median", "cbo_std",
-        "dit_mean", "dit_median", "dit_std",
-        "lcom_mean", "lcom_median", "lcom_std",
-    ]:
-        if col in df_ck.columns:
-            df_ck[col] = pd.to_numeric(df_ck[col], errors="coerce")
+    # Typed reads replace the former pd.to_numeric coercion pass
+    df_repos = read_table(repos_csv, REPOS_DTYPES)
+    df_cloc = read_table(cloc_csv, CLOC_DTYPES)
+    df_ck = read_table(ck_csv, CK_DTYPES)
 
     # Deduplicate per repo by choosing the most complete measurement to avoid Cartesian expansion on merge
     # - For cloc: prefer the row with highest 'code' (fallback to last occurrence)
     # - For CK:   prefer the row with highest 'n_classes' (fallback to last occurrence)
-    if "repo" in df_cloc.columns and not df_cloc.empty:
-        try:
-            if "code" in df_cloc.columns:
-                idx = df_cloc.groupby("repo")["code"].idxmax()
-                df_cloc = df_cloc.loc[idx]
-            else:
-                df_cloc = df_cloc.drop_duplicates(subset=["repo"], keep="last")
-        except Exception:
-            df_cloc = df_cloc.drop_duplicates(subset=["repo"], keep="last")
-        df_cloc = df_cloc.reset_index(drop=True)
-    if "repo" in df_ck.columns and not df_ck.empty:
-        try:
-            if "n_classes" in df_ck.columns:
-                idx = df_ck.groupby("repo")["n_classes"].idxmax()
-                df_ck = df_ck.loc[idx]
-            else:
-                df_ck = df_ck.drop_duplicates(subset=["repo"], keep="last")
-        except Exception:
-            df_ck = df_ck.drop_duplicates(subset=["repo"], keep="last")
-        df_ck = df_ck.reset_index(drop=True)
+    df_cloc = dedup_by_repo(df_cloc, "code")
+    df_ck = dedup_by_repo(df_ck, "n_classes")
     # Merge
     df = df_repos.merge(df_cloc, on="repo", how="left").merge(df_ck, on="repo", how="left")
     return df
@@ -94,45 +93,49 @@ def compute_correlations(df: pd.DataFrame) -> pd.DataFrame:
         "dit_mean", "dit_median", "dit_std",
         "lcom_mean", "lcom_median", "lcom_std",
     ]
-    rows = []
-    from scipy.stats import spearmanr, pearsonr
+    from scipy.stats import t as t_dist
+
+    p_cols = [c for cols in metrics.values() for c in cols if c in df.columns]
+    q_cols = [c for c in quality if c in df.columns]
+    if not p_cols or not q_cols:
+        return pd.DataFrame()
+    sub = df[p_cols + q_cols].astype("float64")
+
+    # Full matrices in one pass; pandas uses pairwise-complete observations,
+    # matching the former per-pair dropna()
+    pearson = sub.corr(method="pearson").loc[p_cols, q_cols]
+    spearman = sub.corr(method="spearman").loc[p_cols, q_cols]
+    valid = sub.notna().astype("int64")
+    n = (valid[p_cols].T @ valid[q_cols]).loc[p_cols, q_cols]
+
+    def p_values(r: pd.DataFrame) -> pd.DataFrame:
+        # Two-sided t-test for r with n-2 degrees of freedom (as scipy's pearsonr/spearmanr)
+        dof = (n - 2).where(n > 2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_stat = r.abs() * np.sqrt(dof / (1.0 - r ** 2).clip(lower=0.0))
+        return pd.DataFrame(2 * t_dist.sf(t_stat, dof), index=r.index, columns=r.columns)
+
+    pearson_p = p_values(pearson)
+    spearman_p = p_values(spearman)
 
+    rows = []
     for proc_group, proc_cols in metrics.items():
         for pcol in proc_cols:
-            if pcol not in df.columns:
+            if pcol not in p_cols:
                 continue
-            for qcol in quality:
-                if qcol not in df.columns:
-                    continue
-                sub = df[[pcol, qcol]].dropna()
-                if len(sub) < 3:
-                    continue
-                x = sub[pcol].values
-                y = sub[qcol].values
-                # Skip if either side is constant (zero variance) to avoid undefined correlations
-                try:
-                    if np.nanstd(x) == 0 or np.nanstd(y) == 0:
-                        continue
-                except Exception:
-                    # If std computation fails for any reason, skip this pair
+            for qcol in q_cols:
+                # Fewer than 3 pairs or a constant side (undefined correlation) are skipped
+                if n.at[pcol, qcol] < 3 or pd.isna(pearson.at[pcol, qcol]):
                     continue
-                try:
-                    sp_r, sp_p = spearmanr(x, y)
-                except Exception:
-                    sp_r, sp_p = np.nan, np.nan
-                try:
-                    pe_r, pe_p = pearsonr(x, y)
-                except Exception:
-                    pe_r, pe_p = np.nan, np.nan
                 rows.append({
                     "process": proc_group,
                     "x": pcol,
                     "y": qcol,
-                    "spearman_r": sp_r,
-                    "spearman_p": sp_p,
-                    "pearson_r": pe_r,
-                    "pearson_p": pe_p,
-                    "n": len(sub),
+                    "spearman_r": spearman.at[pcol, qcol],
+                    "spearman_p": spearman_p.at[pcol, qcol],
+                    "pearson_r": pearson.at[pcol, qcol],
+                    "pearson_p": pearson_p.at[pcol, qcol],
+                    "n": int(n.at[pcol, qcol]),
                 })
     return pd.DataFrame(rows)
 
@@ -150,9 +153,25 @@ def describe_by_repo(df: pd.DataFrame) -> pd.DataFrame:
     return df[present]
 
 
-def make_plots(df: pd.DataFrame, out_dir: str) -> None:
+def _plot_pair(sub: pd.DataFrame, x: str, y: str, out_dir: str) -> str:
+    # Runs in a worker process: force a non-GUI backend before pyplot is imported
+    import matplotlib
+    matplotlib.use("Agg")
     import seaborn as sns
     import matplotlib.pyplot as plt
+
+    path = os.path.join(out_dir, f"{x}_vs_{y}.png")
+    plt.figure(figsize=(6, 4))
+    sns.regplot(data=sub, x=x, y=y, scatter_kws={"s": 10, "alpha": 0.5}, line_kws={"color": "red"})
+    plt.title(f"{x} vs {y}")
+    plt.tight_layout()
+    plt.savefig(path, dpi=150)
+    plt.close()
+    return path
+
+
+def make_plots(df: pd.DataFrame, out_dir: str, workers: Optional[int] = None) -> None:
+    from concurrent.futures import ProcessPoolExecutor
     ensure_dir(out_dir)
 
     pairs = [
@@ -160,18 +179,27 @@ def make_plots(df: pd.DataFrame, out_dir: str) -> None:
         ("age_years", "cbo_median"), ("releases", "cbo_median"),
         ("code", "cbo_median"), ("code", "dit_median"), ("code", "lcom_median"),
     ]
+    # Slice the union of plotted columns once; each pair then reads from this narrow frame
+    needed = sorted({c for pair in pairs for c in pair if c in df.columns})
+    base = df[needed]
+    jobs = []
     for x, y in pairs:
-        if x not in df.columns or y not in df.columns:
+        if x not in base.columns or y not in base.columns:
             continue
-        sub = df[[x, y]].dropna()
+        sub = base[[x, y]].dropna()
         if len(sub) < 5:
             continue
-        plt.figure(figsize=(6, 4))
-        sns.regplot(data=sub, x=x, y=y, scatter_kws={"s": 10, "alpha": 0.5}, line_kws={"color": "red"})
-        plt.title(f"{x} vs {y}")
-        plt.tight_layout()
-        plt.savefig(os.path.join(out_dir, f"{x}_vs_{y}.png"), dpi=150)
-        plt.close()
+        jobs.append((sub, x, y))
+    if not jobs:
+        return
+
+    # Each pair renders and encodes its PNG independently; never more processes
+    # than plots (each worker pays a seaborn import) or cores
+    workers = min(len(jobs), workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futs = [ex.submit(_plot_pair, sub, x, y, out_dir) for sub, x, y in jobs]
+        for fut in futs:
+            fut.result()
 
 
 def main() -> int:
@@ -180,6 +208,8 @@ def main() -> int:
     p.add_argument("--data_dir", type=str, default="sprint2/data")
     p.add_argument("--out_dir", type=str, default="sprint2/data/processed")
     p.add_argument("--plots", action="store_true", help="Generate scatter plots")
+    p.add_argument("--plot_workers", type=int, default=None, help="Processes used to render the plots (default: CPU count, capped at the number of plots)")
+    p.add_argument("--no_csv", action="store_true", help="Write only the Parquet outputs (skip the CSV copies read by downstream scripts)")
     args = p.parse_args()
 
     df = load_inputs(args.data_dir)
@@ -187,13 +217,17 @@ def main() -> int:
     desc = describe_by_repo(df)
 
     ensure_dir(args.out_dir)
-    desc.to_csv(os.path.join(args.out_dir, "analysis_summary.csv"), index=False)
-    corr.to_csv(os.path.join(args.out_dir, "correlations.csv"), index=False)
+    desc.to_parquet(os.path.join(args.out_dir, "analysis_summary.parquet"), index=False, compression="zstd")
+    corr.to_parquet(os.path.join(args.out_dir, "correlations.parquet"), index=False, compression="zstd")
+    if not args.no_csv:
+        desc.to_csv(os.path.join(args.out_dir, "analysis_summary.csv"), index=False)
+        corr.to_csv(os.path.join(args.out_dir, "correlations.csv"), index=False)
 
     if args.plots:
-        make_plots(df, os.path.join(args.out_dir, "plots"))
+        make_plots(df, os.path.join(args.out_dir, "plots"), workers=args.plot_workers)
 
-    print(f"analysis_summary.csv e correlations.csv gerados em {args.out_dir}")
+    ext = "parquet" if args.no_csv else "parquet/csv"
+    print(f"analysis_summary e correlations ({ext}) gerados em {args.out_dir}")
     return 0
 
 
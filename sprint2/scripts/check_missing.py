@@ -13,32 +13,23 @@ Outputs (when --write):
 import os
 import csv
 import argparse
-from typing import Set, Tuple
 
+import numpy as np
+import pandas as pd
 
-def read_repos_list(csv_path: str) -> Set[Tuple[str, str]]:
-    items = set()
-    with open(csv_path, encoding="utf-8-sig", newline="") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            repo = (row.get("repo") or "").strip()
-            url = (row.get("url") or "").strip()
-            if repo and url:
-                items.add((repo, url))
-    return items
 
+def read_repos_list(csv_path: str) -> pd.DataFrame:
+    df = pd.read_csv(csv_path, usecols=["repo", "url"], dtype="string", encoding="utf-8-sig")
+    df = df.apply(lambda s: s.str.strip()).replace("", pd.NA).dropna()
+    return df.drop_duplicates().reset_index(drop=True)
 
-def read_repo_set(csv_path: str) -> Set[str]:
-    s: Set[str] = set()
+
+def read_repo_set(csv_path: str) -> np.ndarray:
     if not os.path.isfile(csv_path):
-        return s
-    with open(csv_path, encoding="utf-8-sig", newline="") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            repo = (row.get("repo") or "").strip()
-            if repo:
-                s.add(repo)
-    return s
+        return np.array([], dtype=object)
+    s = pd.read_csv(csv_path, usecols=["repo"], dtype="string", encoding="utf-8-sig")["repo"].str.strip()
+    s = s[s.notna() & (s != "")]
+    return s.unique().to_numpy(dtype=object)
 
 
 def main() -> int:
@@ -56,10 +47,11 @@ def main() -> int:
     cloc_done = read_repo_set(cloc_csv)
     ck_done = read_repo_set(ck_csv)
 
-    all_names = {name for (name, _url) in all_repos}
-    missing_cloc = sorted(all_names - cloc_done)
-    missing_ck = sorted(all_names - ck_done)
-    union_missing = sorted(set(missing_cloc) | set(missing_ck))
+    all_names = all_repos["repo"].unique().to_numpy(dtype=object)
+    # np.setdiff1d/union1d already return sorted unique values
+    missing_cloc = np.setdiff1d(all_names, cloc_done).tolist()
+    missing_ck = np.setdiff1d(all_names, ck_done).tolist()
+    union_missing = np.union1d(missing_cloc, missing_ck).tolist()
 
     print(f"Total repos: {len(all_names)}")
     print(f"CLOC present: {len(cloc_done)}; missing: {len(missing_cloc)}")
@@ -75,7 +67,7 @@ def main() -> int:
 
     if args.write:
         # Map names back to URLs
-        map_url = {name: url for (name, url) in all_repos}
+        map_url = dict(zip(all_repos["repo"], all_repos["url"]))
         out_path = os.path.join(args.out_dir, "missing_repos_next.csv")
         os.makedirs(os.path.dirname(out_path), exist_ok=True)
         with open(out_path, "w", encoding="utf-8", newline="") as f:
@@ -16,21 +16,30 @@ Usage (PowerShell):
 
 Notes:
 - Requires env var GITHUB_TOKEN (classic fine-grained or classic) with public_repo read.
-- Paginates in batches of 100 until reaching --max or list ends.
+- Paginates in batches of 50 per star band; all bands share one aliased
+  request per round-trip, until reaching --max or the lists end.
 - Sorts by stars (desc) and filters language:Java.
 """
 from __future__ import annotations
 import os
 import sys
-import csv
 import time
+from concurrent.futures import ThreadPoolExecutor
 import math
 import json
-from dataclasses import dataclass
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson  # optional C JSON codec
+except ImportError:
+    orjson = None
 
 GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
 BATCH_SIZE = 50
@@ -43,60 +52,81 @@ def iso_to_dt(s: str) -> datetime:
     return datetime.fromisoformat(s)
 
 
-def years_between(start: datetime, end: Optional[datetime] = None) -> float:
-    end = end or datetime.now(timezone.utc)
-    delta = end - start
-    return delta.total_seconds() / (365.25 * 24 * 3600)
-
-
-@dataclass
-class RepoItem:
-    repo: str
-    url: str
-    stars: int
-    created_at: str
-    releases: int
-    age_years: float
-
-
-def build_query(after_cursor: Optional[str]) -> Dict[str, Any]:
-    query_str = "language:Java sort:stars"
+# Non-overlapping star bands (high -> low). Each band is an aliased search in the
+# same POST, so one round-trip advances every open band (lower bands are opened
+# only while the higher ones can't cover --max); each band must stay under
+# GitHub's 1000-results-per-search cap unless it is the last one needed.
+STAR_BANDS = [">=50000", "20000..49999", "10000..19999", "5000..9999", "<5000"]
+RATE_LOW_WATER = 50
+# Concurrent POSTs per round; kept low to stay clear of GitHub's secondary rate limits
+MAX_CONCURRENT = 2
+
+SEARCH_FIELDS = (
+    "    repositoryCount\n"
+    "    pageInfo { hasNextPage endCursor }\n"
+    "    edges {\n"
+    "      node {\n"
+    "        ... on Repository {\n"
+    "          nameWithOwner url stargazerCount createdAt isArchived isDisabled\n"
+    "          releases { totalCount }\n"
+    "          primaryLanguage { name }\n"
+    "        }\n"
+    "      }\n"
+    "    }\n"
+)
+
+
+def build_query(cursors: Dict[int, Optional[str]]) -> Dict[str, Any]:
+    """Build one request with an aliased search per active band (b<i>)."""
+    var_defs = ["$pageSize: Int!"]
+    parts = ["  rateLimit { cost remaining resetAt }\n"]
+    variables: Dict[str, Any] = {"pageSize": BATCH_SIZE}
+    for i, cursor in cursors.items():
+        var_defs += [f"$q{i}: String!", f"$c{i}: String"]
+        parts.append(
+            f"  b{i}: search(query: $q{i}, type: REPOSITORY, first: $pageSize, after: $c{i}) {{\n"
+            + SEARCH_FIELDS
+            + "  }\n"
+        )
+        variables[f"q{i}"] = f"language:Java stars:{STAR_BANDS[i]} sort:stars"
+        variables[f"c{i}"] = cursor
     query = {
-        "query": (
-            "query($queryStr: String!, $pageSize: Int!, $cursor: String) {\n"
-            "  rateLimit { cost remaining resetAt }\n"
-            "  search(query: $queryStr, type: REPOSITORY, first: $pageSize, after: $cursor) {\n"
-            "    repositoryCount\n"
-            "    pageInfo { hasNextPage endCursor }\n"
-            "    edges {\n"
-            "      node {\n"
-            "        ... on Repository {\n"
-            "          nameWithOwner url stargazerCount createdAt isArchived isDisabled\n"
-            "          releases { totalCount }\n"
-            "          primaryLanguage { name }\n"
-            "        }\n"
-            "      }\n"
-            "    }\n"
-            "  }\n"
-            "}"
-        ),
-        "variables": {
-            "queryStr": query_str,
-            "pageSize": BATCH_SIZE,
-            "cursor": after_cursor,
-        },
+        "query": "query(" + ", ".join(var_defs) + ") {\n" + "".join(parts) + "}",
+        "variables": variables,
     }
     return query
 
 
-def graphql_request(session: requests.Session, token: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-    headers = {
+def wait_for_rate_limit(rate: Dict[str, Any]) -> None:
+    """Sleep only when the remaining budget is low, until the window resets."""
+    remaining = rate.get("remaining")
+    reset_at = rate.get("resetAt")
+    if remaining is None or remaining >= RATE_LOW_WATER or not reset_at:
+        return
+    delay = (iso_to_dt(reset_at) - datetime.now(timezone.utc)).total_seconds()
+    if delay > 0:
+        print(f"Rate limit baixo ({remaining}); aguardando {delay:.0f}s", file=sys.stderr)
+        time.sleep(delay + 1)
+
+
+def make_session(token: str) -> requests.Session:
+    """Session reused for every call: keeps the TLS connection and static headers."""
+    session = requests.Session()
+    session.headers.update({
         "Authorization": f"bearer {token}",
         "Content-Type": "application/json",
         "Accept": "application/json",
-        "User-Agent": "sprint2-metrics-script"
-    }
-    resp = session.post(GITHUB_GRAPHQL_URL, json=payload, headers=headers, timeout=60)
+        "User-Agent": "sprint2-metrics-script",
+    })
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+    return session
+
+
+def graphql_request(session: requests.Session, payload: Dict[str, Any]) -> Dict[str, Any]:
+    if orjson is not None:
+        resp = session.post(GITHUB_GRAPHQL_URL, data=orjson.dumps(payload), timeout=60)
+    else:
+        resp = session.post(GITHUB_GRAPHQL_URL, json=payload, timeout=60)
     if resp.status_code == 401:
         raise SystemExit("Unauthorized. Check GITHUB_TOKEN.")
     if resp.status_code == 403:
@@ -108,7 +138,7 @@ def graphql_request(session: requests.Session, token: str, payload: Dict[str, An
             msg = resp.text
         raise RuntimeError(f"403 Forbidden / Rate limit: {msg}")
     resp.raise_for_status()
-    data = resp.json()
+    data = orjson.loads(resp.content) if orjson is not None else json.loads(resp.content)
     if "errors" in data:
         raise RuntimeError(f"GraphQL errors: {data['errors']}")
     return data["data"]
@@ -118,70 +148,148 @@ def ensure_parent_dir(path: str) -> None:
     os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
 
 
-def save_csv(rows: List[RepoItem], out_path: str) -> None:
+def save_csv(table: pa.Table, out_path: str) -> None:
     ensure_parent_dir(out_path)
-    with open(out_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(["repo", "url", "stars", "created_at", "releases", "age_years"])
-        for r in rows:
-            w.writerow([r.repo, r.url, r.stars, r.created_at, r.releases, f"{r.age_years:.6f}"])
+    pacsv.write_csv(table, out_path, write_options=pacsv.WriteOptions(include_header=True))
 
 
-def fetch_top_java_repos(max_items: int, token: str) -> List[RepoItem]:
-    items: List[RepoItem] = []
-    after: Optional[str] = None
-    session = requests.Session()
+def _keep(node: Dict[str, Any]) -> bool:
+    # Filter to Java repos only (redundant due to query) and not disabled/archived
+    primary_lang = (node.get("primaryLanguage") or {}).get("name")
+    if primary_lang and primary_lang.lower() != "java":
+        return False
+    return not node.get("isDisabled")
 
-    while len(items) < max_items:
-        payload = build_query(after)
-        data = graphql_request(session, token, payload)
-        search = data["search"]
-        page_info = search["pageInfo"]
-        edges = search.get("edges") or []
-
-        batch_count = 0
-        for e in edges:
-            node = e.get("node") or {}
-            # Filter to Java repos only (redundant due to query) and not disabled/archived
-            primary_lang = (node.get("primaryLanguage") or {}).get("name")
-            if primary_lang and primary_lang.lower() != "java":
-                continue
-            if node.get("isDisabled"):
-                continue
-            name_with_owner = node.get("nameWithOwner")
-            url = node.get("url")
-            stars = int(node.get("stargazerCount") or 0)
-            created_at = node.get("createdAt")
-            releases = int(((node.get("releases") or {}).get("totalCount")) or 0)
-
-            try:
-                created_dt = iso_to_dt(created_at)
-                age = years_between(created_dt)
-            except Exception:
-                created_dt = None
-                age = float("nan")
-
-            items.append(RepoItem(
-                repo=name_with_owner,
-                url=url,
-                stars=stars,
-                created_at=created_at,
-                releases=releases,
-                age_years=age,
-            ))
-            batch_count += 1
-            if len(items) >= max_items:
-                break
 
-        if len(items) >= max_items:
-            break
-        if not page_info.get("hasNextPage"):
-            break
-        after = page_info.get("endCursor")
-        # be nice with API
-        time.sleep(2)
+def ages_in_years(created: List[Optional[str]]) -> np.ndarray:
+    """Vectorized age (years) for ISO8601 UTC timestamps; NaN when missing/invalid."""
+    # GitHub returns e.g. "2012-01-01T00:00:00Z": drop the Z so numpy parses it as UTC
+    raw = [c[:-1] if c and c.endswith("Z") else (c or "NaT") for c in created]
+    try:
+        stamps = np.array(raw, dtype="datetime64[s]")
+    except ValueError:
+        stamps = np.array([_parse_or_nat(c) for c in raw], dtype="datetime64[s]")
+    now = np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None), "s")
+    return (now - stamps) / np.timedelta64(1, "s") / (365.25 * 24 * 3600)
+
 
-    return items
+def _parse_or_nat(s: str) -> np.datetime64:
+    try:
+        return np.datetime64(s, "s")
+    except ValueError:
+        return np.datetime64("NaT")
+
+
+def to_table(nodes: List[Dict[str, Any]]) -> pa.Table:
+    """Columnar result: one array per output column, in CSV order."""
+    created = [n.get("createdAt") for n in nodes]
+    ages = np.round(ages_in_years(created), 6)
+    return pa.table({
+        "repo": [n.get("nameWithOwner") for n in nodes],
+        "url": [n.get("url") for n in nodes],
+        "stars": pa.array([int(n.get("stargazerCount") or 0) for n in nodes], pa.int32()),
+        "created_at": created,
+        "releases": pa.array([int(((n.get("releases") or {}).get("totalCount")) or 0) for n in nodes], pa.int32()),
+        "age_years": pa.array(ages, pa.float64(), from_pandas=True),
+    })
+
+
+def _enough(bands: List[List[Dict[str, Any]]], done: List[bool], max_items: int) -> bool:
+    # Bands are ordered by stars: once every band above the current one is
+    # complete, the first max_items rows across them are the global top.
+    total = 0
+    for items, finished in zip(bands, done):
+        total += len(items)
+        if total >= max_items:
+            return True
+        if not finished:
+            return False
+    return True
+
+
+def fetch_bands(session: requests.Session, ex: ThreadPoolExecutor, active: Dict[int, Optional[str]]) -> Dict[str, Any]:
+    """Split the active bands into MAX_CONCURRENT aliased requests sent in parallel.
+
+    Returns the merged ``data`` (one ``b<i>`` key per band) and the most
+    conservative ``rateLimit`` seen among the responses.
+    """
+    keys = list(active)
+    groups = [keys[g::MAX_CONCURRENT] for g in range(MAX_CONCURRENT)]
+    payloads = [build_query({i: active[i] for i in grp}) for grp in groups if grp]
+    merged: Dict[str, Any] = {}
+    rate: Dict[str, Any] = {}
+    for data in ex.map(lambda pl: graphql_request(session, pl), payloads):
+        r = data.pop("rateLimit", None) or {}
+        if not rate or (r.get("remaining") or 0) < (rate.get("remaining") or 0):
+            rate = r
+        merged.update(data)
+    merged["rateLimit"] = rate
+    return merged
+
+
+def fetch_top_java_repos(max_items: int, token: str) -> pa.Table:
+    session = make_session(token)
+    bands: List[List[Dict[str, Any]]] = [[] for _ in STAR_BANDS]
+    done = [False] * len(STAR_BANDS)
+    cursors: List[Optional[str]] = [None] * len(STAR_BANDS)
+    counts: List[Optional[int]] = [None] * len(STAR_BANDS)
+    opened = 0
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT) as ex:
+        while not _enough(bands, done, max_items):
+            # Open bands high -> low: a lower band is added only while the opened ones
+            # can't cover max_items (finished bands by what they kept, the others by
+            # their repositoryCount); a band whose count is still unknown stops the scan
+            while opened < len(STAR_BANDS):
+                reach: Optional[int] = 0
+                for i in range(opened):
+                    if done[i]:
+                        reach += len(bands[i])
+                    elif counts[i] is None:
+                        reach = None
+                        break
+                    else:
+                        reach += min(counts[i], 1000)
+                if reach is None or reach >= max_items:
+                    break
+                opened += 1
+            # Only opened bands that can still contribute to the top-N are queried
+            active: Dict[int, Optional[str]] = {}
+            needed = 0
+            for i in range(opened):
+                if not done[i]:
+                    active[i] = cursors[i]
+                needed += len(bands[i])
+                if needed >= max_items:
+                    break
+            if not active:
+                break
+            data = fetch_bands(session, ex, active)
+            for i in active:
+                search = data[f"b{i}"]
+                page_info = search["pageInfo"]
+                counts[i] = search.get("repositoryCount") or 0
+                for e in search.get("edges") or []:
+                    node = e.get("node") or {}
+                    if _keep(node):
+                        bands[i].append(node)
+                if not page_info.get("hasNextPage"):
+                    done[i] = True
+                    if (search.get("repositoryCount") or 0) > 1000 and i < len(STAR_BANDS) - 1:
+                        print(f"AVISO: faixa stars:{STAR_BANDS[i]} excede 1000 resultados; divida a faixa.", file=sys.stderr)
+                cursors[i] = page_info.get("endCursor")
+            # be nice with API: back off only when the budget is low
+            wait_for_rate_limit(data.get("rateLimit") or {})
+
+    nodes: List[Dict[str, Any]] = []
+    seen = set()
+    for band in bands:
+        for n in band:
+            if n.get("nameWithOwner") not in seen:
+                seen.add(n.get("nameWithOwner"))
+                nodes.append(n)
+    # Ages are computed once for the whole result instead of per node
+    return to_table(nodes[:max_items])
 
 
 def parse_args(argv: List[str]) -> Dict[str, Any]:
@@ -210,17 +318,17 @@ def main(argv: List[str]) -> int:
         print(f"Fetching up to {max_items} repos...", file=sys.stderr)
 
     try:
-        rows = fetch_top_java_repos(max_items=max_items, token=token)
+        table = fetch_top_java_repos(max_items=max_items, token=token)
     except RuntimeError as e:
         print(f"GraphQL error: {e}", file=sys.stderr)
         return 1
 
-    save_csv(rows, out_path)
+    save_csv(table, out_path)
 
     if verbose:
-        print(f"Saved {len(rows)} rows to {out_path}")
+        print(f"Saved {table.num_rows} rows to {out_path}")
     else:
-        print(f"OK: {len(rows)} repos -> {out_path}")
+        print(f"OK: {table.num_rows} repos -> {out_path}")
     return 0
 
 
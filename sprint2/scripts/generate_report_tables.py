@@ -1,26 +1,27 @@
-import csv
 from pathlib import Path
 
+import pandas as pd
+
 ROOT = Path(__file__).resolve().parents[1]
 PROCESSED = ROOT / 'data' / 'processed'
 REPORT = ROOT / 'docs' / 'RELATORIO.md'
 
-# Simple CSV reader
+# CSV reader: cells are kept as text, exactly as written in the CSV, so the
+# tables reproduce the original values; numeric views are derived per column.
 
 def read_csv_rows(path):
-    with open(path, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        return list(reader)
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+def to_float(col):
+    return pd.to_numeric(col, errors='coerce')
 
 # Build markdown tables
 
 def md_table(headers, rows):
-    out = []
-    out.append('| ' + ' | '.join(headers) + ' |')
-    out.append('| ' + ' | '.join(['---'] * len(headers)) + ' |')
-    for r in rows:
-        out.append('| ' + ' | '.join(r.get(h, '') for h in headers) + ' |')
-    return '\n'.join(out)
+    header_line = '| ' + ' | '.join(headers) + ' |'
+    sep_line = '| ' + ' | '.join(['---'] * len(headers)) + ' |'
+    body = [f"| {' | '.join([r.get(h, '') for h in headers])} |" for r in rows]
+    return '\n'.join([header_line, sep_line, *body])
 
 # Extract top-5 from correlations.csv
 
@@ -28,61 +29,22 @@ def top5_correlations(kind='spearman'):
     """Return top-5 rows by |r| for the given kind ('spearman' or 'pearson').
     correlations.csv schema: process,x,y,spearman_r,spearman_p,pearson_r,pearson_p,n
     """
-    path = PROCESSED / 'correlations.csv'
-    rows = read_csv_rows(path)
+    df = read_csv_rows(PROCESSED / 'correlations.csv')
     r_key = f'{kind.lower()}_r'
     p_key = f'{kind.lower()}_p'
     # Filter rows that have both r and p numeric and n>=50
-    filt = []
-    for r in rows:
-        try:
-            rv = float(r.get(r_key, ''))
-            pv = float(r.get(p_key, ''))
-            nv = float(r.get('n', '0') or 0)
-        except Exception:
-            continue
-        if not (nv >= 50):
-            continue
-        r['_rval'] = rv
-        r['_pval'] = pv
-        filt.append(r)
-    filt.sort(key=lambda r: abs(r['_rval']), reverse=True)
-    top = filt[:5]
-    rows_md = []
-    for r in top:
-        rows_md.append({
-            'x': r.get('x',''),
-            'y': r.get('y',''),
-            'r': f"{r.get(r_key,'')}",
-            'p': f"{r.get(p_key,'')}",
-            'n': r.get('n',''),
-        })
-    return rows_md
+    rv = to_float(df[r_key])
+    keep = rv.notna() & to_float(df[p_key]).notna() & to_float(df['n']).fillna(0).ge(50)
+    top = df.loc[keep].assign(_abs=rv.abs()).nlargest(5, '_abs')
+    return top[['x', 'y', r_key, p_key, 'n']].rename(columns={r_key: 'r', p_key: 'p'}).to_dict('records')
 
 # Extract median |Spearman| by process metric from correlations.csv if present
 
 def median_abs_spearman_by_x():
-    path = PROCESSED / 'correlations.csv'
-    rows = read_csv_rows(path)
+    df = read_csv_rows(PROCESSED / 'correlations.csv')
     # Compute median of |spearman_r| grouped by x
-    from statistics import median
-    by_x = {}
-    for r in rows:
-        x = r.get('x','')
-        try:
-            val = abs(float(r.get('spearman_r','')))
-        except Exception:
-            continue
-        by_x.setdefault(x, []).append(val)
-    data = []
-    for x, vals in by_x.items():
-        if not vals:
-            continue
-        try:
-            med = median(vals)
-        except Exception:
-            continue
-        data.append({'x': x, 'median_|r|': f"{med:.3f}"})
+    med = to_float(df['spearman_r']).abs().groupby(df['x'], sort=False).median().dropna()
+    data = [{'x': x, 'median_|r|': f"{v:.3f}"} for x, v in med.items()]
     data.sort(key=lambda d: float(d['median_|r|']), reverse=True)
     return data
 
@@ -14,51 +14,29 @@ It will find all files matching cloc_summary*.csv and ck_summary*.csv,
 concatenate them (preserving header once), and write canonical files.
 Duplicates by repo are allowed; the analysis script will dedupe.
 """
+import io
 import os
 import csv
 import glob
 import argparse
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 
-def merge_shards(base_path: str, shard_pattern: str, out_path: str) -> int:
-    shard_files = sorted(glob.glob(shard_pattern))
-    total = 0
-    header = None
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:  # stdlib streaming path below still works
+    pd = None
 
-    # Write to temp then replace to avoid partial files
-    tmp_path = out_path + ".tmp"
-    # We'll load rows into memory to allow per-repo de-duplication safely (datasets ~1k rows)
-    rows_acc: List[List[str]] = []
 
-    def _append_file(fp: str):
-        nonlocal header
-        with open(fp, encoding="utf-8", newline="") as fin:
-            reader = csv.reader(fin)
-            rows = list(reader)
-            if not rows:
-                return
-            if header is None:
-                header = rows[0]
-            start = 1 if rows and rows[0] == header else 0
-            for r in rows[start:]:
-                rows_acc.append(r)
-    # 1) Append base canonical file first if exists
-    if os.path.isfile(base_path):
-        _append_file(base_path)
-    # 2) Append all shard files (skip out_path and base_path to avoid self-include)
-    for fp in shard_files:
-        if os.path.abspath(fp) in {os.path.abspath(out_path), os.path.abspath(base_path)}:
-            continue
-        _append_file(fp)
-    # De-duplicate by repo, keeping the "best" row
-    # Determine column indices
-    if not header:
-        return 0
-    col_index: Dict[str, int] = {name: idx for idx, name in enumerate(header)}
-    is_cloc = "files" in col_index and "code" in col_index
-    is_ck = "n_classes" in col_index
+def _best_rows_stream(files: List[str]) -> Tuple[Optional[List[str]], List[List[str]]]:
+    """Row-by-row reduction with csv.reader: keeps the best row per repo."""
+    header: Optional[List[str]] = None
+    # Single pass: rows are compared as they are read and only the best row per
+    # repo is kept, so memory is O(unique repos) instead of O(total rows)
+    best_by_repo: Dict[str, List[str]] = {}
+    col_index: Dict[str, int] = {}
+    is_cloc = is_ck = False
 
     def _parse_int(x: str) -> int:
         try:
@@ -66,43 +44,139 @@ def merge_shards(base_path: str, shard_pattern: str, out_path: str) -> int:
         except Exception:
             return -1
 
-    best_by_repo: Dict[str, List[str]] = {}
-    for r in rows_acc:
-        repo = r[col_index.get("repo", 0)] if r else ""
-        if not repo:
-            continue
-        cur_best = best_by_repo.get(repo)
-        if cur_best is None:
-            best_by_repo[repo] = r
-            continue
-        # Compare
+    def _better(r: List[str], cur_best: List[str]) -> bool:
         if is_cloc:
             code_new = _parse_int(r[col_index["code"]])
             code_old = _parse_int(cur_best[col_index["code"]])
-            if code_new > code_old:
-                best_by_repo[repo] = r
-            elif code_new == code_old:
-                files_new = _parse_int(r[col_index["files"]])
-                files_old = _parse_int(cur_best[col_index["files"]])
-                if files_new > files_old:
-                    best_by_repo[repo] = r
-        elif is_ck:
-            n_new = _parse_int(r[col_index["n_classes"]])
-            n_old = _parse_int(cur_best[col_index["n_classes"]])
-            if n_new > n_old:
+            if code_new != code_old:
+                return code_new > code_old
+            files_new = _parse_int(r[col_index["files"]])
+            files_old = _parse_int(cur_best[col_index["files"]])
+            return files_new > files_old
+        if is_ck:
+            return _parse_int(r[col_index["n_classes"]]) > _parse_int(cur_best[col_index["n_classes"]])
+        # Fallback: keep first
+        return False
+
+    def _rows(fp: str):
+        # Yields data rows lazily; the first file read fixes the header/columns
+        nonlocal header, col_index, is_cloc, is_ck
+        with open(fp, encoding="utf-8", newline="") as fin:
+            reader = csv.reader(fin)
+            first = next(reader, None)
+            if first is None:
+                return
+            if header is None:
+                header = first
+                # Determine column indices
+                col_index = {name: idx for idx, name in enumerate(header)}
+                is_cloc = "files" in col_index and "code" in col_index
+                is_ck = "n_classes" in col_index
+            elif first != header:
+                yield first
+            yield from reader
+
+    for fp in files:
+        for r in _rows(fp):
+            repo = r[col_index.get("repo", 0)] if r else ""
+            if not repo:
+                continue
+            cur_best = best_by_repo.get(repo)
+            if cur_best is None or _better(r, cur_best):
                 best_by_repo[repo] = r
-        else:
-            # Fallback: keep first
-            pass
+    return header, list(best_by_repo.values())
+
+
+def _best_rows_pandas(files: List[str]) -> Tuple[Optional[List[str]], List[List[str]]]:
+    """Same reduction as _best_rows_stream, vectorized with pandas.
 
-    dedup_rows = list(best_by_repo.values())
+    Cells are kept as the original strings so the output is unchanged; only
+    the ranking keys are parsed (int(float(x)) semantics, -1 when invalid).
+    """
+    header: Optional[List[str]] = None
+    frames = []
+    for fp in files:
+        df = pd.read_csv(fp, header=None, dtype=str, keep_default_na=False)
+        if df.empty:
+            continue
+        first = df.iloc[0].tolist()
+        if header is None:
+            header = first
+            df = df.iloc[1:]
+        elif first == header:
+            df = df.iloc[1:]
+        frames.append(df)
+    if header is None:
+        return None, []
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=range(len(header)))
+    col_index = {name: idx for idx, name in enumerate(header)}
+    repo = df[col_index.get("repo", 0)]
+    df = df[repo != ""]
+
+    def _key(name: str) -> pd.Series:
+        v = pd.to_numeric(df[col_index[name]], errors="coerce").astype("float64")
+        return np.trunc(v.where(np.isfinite(v), -1.0))
+
+    if "files" in col_index and "code" in col_index:
+        keys = pd.DataFrame({"k1": _key("code"), "k2": _key("files")})
+    elif "n_classes" in col_index:
+        keys = pd.DataFrame({"k1": _key("n_classes")})
+    else:
+        keys = pd.DataFrame(index=df.index)
+    repo = df[col_index.get("repo", 0)]
+    # Best first; the stable sort keeps the earliest row among ties (the
+    # streaming path only replaces on a strictly better row)
+    order = keys.sort_values(list(keys.columns), ascending=False, kind="stable").index if len(keys.columns) else df.index
+    best = df.loc[order].drop_duplicates(subset=[col_index.get("repo", 0)], keep="first")
+    # Output follows the first appearance of each repo, as the dict did
+    first_seen = repo.drop_duplicates(keep="first")
+    best = best.set_index(col_index.get("repo", 0), drop=False).loc[first_seen.values]
+    return header, best.values.tolist()
+
+
+def merge_shards(base_path: str, shard_pattern: str, out_path: str) -> int:
+    shard_files = sorted(glob.glob(shard_pattern))
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+    # Write to temp then replace to avoid partial files
+    tmp_path = out_path + ".tmp"
+    # 1) Base canonical file first if exists
+    files = [base_path] if os.path.isfile(base_path) else []
+    # 2) All shard files (skip out_path and base_path to avoid self-include)
+    skip = {os.path.abspath(out_path), os.path.abspath(base_path)}
+    files += [fp for fp in shard_files if os.path.abspath(fp) not in skip]
+
+    header: Optional[List[str]] = None
+    if pd is not None:
+        try:
+            header, dedup_rows = _best_rows_pandas(files)
+        except (pd.errors.ParserError, ValueError):
+            # Ragged rows etc.: the csv module is more forgiving
+            header = None
+    if header is None:
+        header, dedup_rows = _best_rows_stream(files)
+    if not header:
+        return 0
     total = len(dedup_rows)
 
+    # Render once; if the canonical file already has exactly this content
+    # (re-merge with no new shard rows) leave it untouched
+    buf = io.StringIO(newline="")
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    writer.writerows(dedup_rows)
+    data = buf.getvalue().encode("utf-8")
+    try:
+        if os.path.getsize(out_path) == len(data):
+            with open(out_path, "rb") as fin:
+                if fin.read() == data:
+                    return total
+    except OSError:
+        pass
+
     # Write
-    with open(tmp_path, "w", newline="", encoding="utf-8") as fout:
-        writer = csv.writer(fout)
-        writer.writerow(header)
-        writer.writerows(dedup_rows)
+    with open(tmp_path, "wb") as fout:
+        fout.write(data)
 
     # Replace atomically
     try:
@@ -15,11 +15,16 @@ Usage (PowerShell):
 import os
 import sys
 import argparse
-from typing import List
+import functools
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
 # Reuse helpers from process_streaming
 from process_streaming import (
-    ensure_dir,
+    EXE_CACHE_NAME,
+    cached_exe_path,
     resolve_executable,
     run_cloc_tree,
     run_ck,
@@ -28,6 +33,91 @@ from process_streaming import (
     find_ck_jar,
 )
 
+# Build/VCS/IDE dirs never holding the project's own sources; skipped before descending
+PRUNE = frozenset({'.git', '.gradle', 'target', 'build', 'dist', 'node_modules', 'out', 'coverage', '.idea', '.mvn', 'bin'})
+# Multi-suffix endswith runs in C and avoids a lower() copy of every file name
+JAVA_SUFFIXES = ('.java', '.Java', '.JAVA')
+# Package dirs (com/org/...) sit between src/main/java and the first source file;
+# the probe stops at the first hit, so a few levels cost only a handful of listings
+PROBE_DEPTH = 6
+
+JDK_GLOBS = [
+    r"C:\\Program Files\\Eclipse Adoptium\\jdk-21*\\bin\\java.exe",
+    r"C:\\Program Files\\Eclipse Adoptium\\jdk-17*\\bin\\java.exe",
+    r"C:\\Program Files\\Java\\jdk*\\bin\\java.exe",
+    r"C:\\Program Files\\Microsoft\\jdk*\\bin\\java.exe",
+]
+CLOC_CANDIDATES = [
+    r"C:\\ProgramData\\chocolatey\\bin\\cloc.exe",
+    r"C:\\Program Files\\cloc\\cloc.exe",
+]
+
+
+def _has_java_within(path: str, depth: int) -> bool:
+    """True if a .java file exists at most ``depth`` directory levels below path."""
+    try:
+        it = os.scandir(path)
+    except OSError:
+        return False
+    subdirs = []
+    with it:
+        for entry in it:
+            if entry.name in PRUNE:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.endswith(JAVA_SUFFIXES):
+                return True
+    if depth > 0:
+        for d in subdirs:
+            if _has_java_within(d, depth - 1):
+                return True
+    return False
+
+
+def _probe_java_exe() -> Optional[str]:
+    # PATH and JAVA_HOME first; the JDK wildcard scans only run when both miss
+    is_windows = os.name == "nt"
+    name = "java.exe" if is_windows else "java"
+    java_home = os.environ.get("JAVA_HOME")
+    found = resolve_executable(name, None, [os.path.join(java_home, "bin", name)] if java_home else [])
+    if found or not is_windows:
+        return found
+    import glob as _glob
+    for pat in JDK_GLOBS:
+        for cand in _glob.glob(pat):
+            if os.path.isfile(cand):
+                return cand
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_java_exe(explicit: Optional[str], cache_path: str) -> Optional[str]:
+    if explicit:
+        return resolve_executable("java", explicit)
+    return cached_exe_path(f"java|{os.name}", _probe_java_exe, cache_path)
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_cloc_exe(explicit: Optional[str], cache_path: str) -> Optional[str]:
+    if explicit:
+        return resolve_executable("cloc", explicit)
+    is_windows = os.name == "nt"
+    return cached_exe_path(
+        f"cloc|{os.name}",
+        lambda: resolve_executable("cloc.exe" if is_windows else "cloc", None, CLOC_CANDIDATES if is_windows else []),
+        cache_path,
+    )
+
+
+def _resolve_ck_jar(explicit: Optional[str], cache_path: str) -> str:
+    if explicit:
+        return find_ck_jar(explicit)
+    # find_ck_jar searches the tools dir next to these scripts; a checkout elsewhere gets its own entry
+    tools_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tools", "ck"))
+    # find_ck_jar raises FileNotFoundError rather than returning None
+    return cached_exe_path(f"ck_jar|{tools_dir}|{os.name}", lambda: find_ck_jar(None), cache_path)  # type: ignore[return-value]
+
 
 def main() -> int:
     p = argparse.ArgumentParser(description="Processa um repositório local sem clonar")
@@ -39,6 +129,8 @@ def main() -> int:
     p.add_argument("--git_exe", type=str, default=None)
     p.add_argument("--cloc_exe", type=str, default=None)
     p.add_argument("--java_exe", type=str, default=None)
+    p.add_argument("--native_loc", action="store_true", help="Conta LOC Java em processo (sem cloc)")
+    p.add_argument("--work_dir", type=str, default=os.path.join("sprint2", "data", "_stream_tmp"), help="Pasta do cache de executáveis (mesma do process_streaming.py)")
     args = p.parse_args()
 
     repo_name = args.repo_name
@@ -47,37 +139,21 @@ def main() -> int:
         print(f"ERRO: repo_dir não existe: {repo_dir}", file=sys.stderr)
         return 2
 
+    exe_cache = os.path.join(os.path.abspath(args.work_dir), EXE_CACHE_NAME)
     try:
-        ck_jar = find_ck_jar(args.ck_jar)
+        ck_jar = _resolve_ck_jar(args.ck_jar, exe_cache)
     except FileNotFoundError as e:
         print(str(e), file=sys.stderr)
         return 2
 
-    is_windows = os.name == "nt"
     # Resolve executables
-    java_home = os.environ.get("JAVA_HOME")
-    java_candidates: List[str] = []
-    if java_home:
-        java_candidates.append(os.path.join(java_home, "bin", "java.exe" if is_windows else "java"))
-    if is_windows:
-        import glob as _glob
-        pats = [
-            r"C:\\Program Files\\Eclipse Adoptium\\jdk-21*\\bin\\java.exe",
-            r"C:\\Program Files\\Eclipse Adoptium\\jdk-17*\\bin\\java.exe",
-            r"C:\\Program Files\\Java\\jdk*\\bin\\java.exe",
-            r"C:\\Program Files\\Microsoft\\jdk*\\bin\\java.exe",
-        ]
-        for pat in pats:
-            java_candidates += _glob.glob(pat)
-    cloc_candidates: List[str] = []
-    if is_windows:
-        cloc_candidates = [
-            r"C:\\ProgramData\\chocolatey\\bin\\cloc.exe",
-            r"C:\\Program Files\\cloc\\cloc.exe",
-        ]
-    java_exe = resolve_executable("java.exe" if is_windows else "java", args.java_exe, java_candidates)
-    cloc_exe = resolve_executable("cloc.exe" if is_windows else "cloc", args.cloc_exe, cloc_candidates)
-    if not cloc_exe:
+    java_exe = _resolve_java_exe(args.java_exe, exe_cache)
+    cloc_exe = _resolve_cloc_exe(args.cloc_exe, exe_cache)
+    # Absolute paths: children are spawned directly, without a PATH search
+    java_exe = os.path.abspath(java_exe) if java_exe else None
+    cloc_exe = os.path.abspath(cloc_exe) if cloc_exe else None
+    run_cloc_tree._native = args.native_loc  # type: ignore[attr-defined]
+    if not cloc_exe and not args.native_loc:
         print("AVISO: cloc não encontrado; métricas de LOC ficarão zeradas.")
     if not java_exe:
         print("AVISO: java não encontrado; CK será pulado.")
@@ -86,53 +162,101 @@ def main() -> int:
     cloc_out = os.path.join(args.out_dir, f"cloc_summary{suffix}.csv")
     ck_out = os.path.join(args.out_dir, f"ck_summary{suffix}.csv")
 
+    def _count_java_and_best_root(base: str) -> tuple[int, str, Dict[str, List[str]]]:
+        # .java paths per top-level dir, collected in the same pass for cloc's file-list fallback
+        files_by_top: Dict[str, List[str]] = {}
+        # module attributes bound once; the loop body only touches locals
+        scandir = os.scandir
+        prune = PRUNE
+        suffixes = JAVA_SUFFIXES
+
+        # Explicit stack instead of recursion; children are pushed reversed so
+        # directories are visited in listing order (same tie-breaks as os.walk)
+        stack = [(base, '.')]
+        pop = stack.pop
+        while stack:
+            path, top = pop()
+            try:
+                it = scandir(path)
+            except OSError:
+                continue
+            subdirs = []
+            add_dir = subdirs.append
+            bucket = None
+            child_top = None if top == '.' else top
+            with it:
+                for entry in it:
+                    # prune by name first: cheaper than is_dir() and the subtree is never opened
+                    name = entry.name
+                    if name in prune:
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        add_dir((entry.path, child_top or sys.intern(name)))
+                    elif name.endswith(suffixes):
+                        if bucket is None:
+                            bucket = files_by_top.setdefault(top, [])
+                        bucket.append(entry.path)
+            stack.extend(reversed(subdirs))
+
+        # per-top counts come straight from the collected lists
+        counts = {top: len(files) for top, files in files_by_top.items()}
+        total = sum(counts.values())
+        # pick best
+        if not total:
+            return 0, base, files_by_top
+        best_top = max(counts, key=counts.__getitem__)
+        best_root = base if best_top == '.' else os.path.join(base, best_top)
+        return total, best_root, files_by_top
+
+    # Standard Maven/Gradle layout: CK handles the descent from the repo root,
+    # so the full traversal is only needed when this probe misses
+    java_files: Optional[List[str]] = None
+    has_java = _has_java_within(os.path.join(repo_dir, "src", "main", "java"), PROBE_DEPTH) \
+        or _has_java_within(os.path.join(repo_dir, "src"), PROBE_DEPTH)
+    if has_java:
+        java_root = repo_dir
+    else:
+        # Single traversal shared by CLOC (file-list fallback) and CK (root choice)
+        n_java, java_root, java_files_by_top = _count_java_and_best_root(repo_dir)
+        has_java = n_java > 0
+        java_files = [fp for files in java_files_by_top.values() for fp in files]
+
+    nan_ck_row = {
+        "repo": repo_name,
+        "n_classes": 0,
+        "cbo_mean": "nan",
+        "cbo_median": "nan",
+        "cbo_std": "nan",
+        "dit_mean": "nan",
+        "dit_median": "nan",
+        "dit_std": "nan",
+        "lcom_mean": "nan",
+        "lcom_median": "nan",
+        "lcom_std": "nan",
+    }
+
     # CLOC
-    if cloc_exe:
+    def _do_cloc() -> dict:
+        if not cloc_exe and not args.native_loc:
+            return {"files": 0, "code": 0, "comment": 0, "blank": 0}
         try:
-            cloc = run_cloc_tree(repo_dir, cloc_exe, java_only=True)
+            return run_cloc_tree(repo_dir, cloc_exe, java_only=True, java_files=java_files)
         except Exception as e:
             print(f"[CLOC FAIL] {repo_name}: {e}")
-            cloc = {"files": 0, "code": 0, "comment": 0, "blank": 0}
-    else:
-        cloc = {"files": 0, "code": 0, "comment": 0, "blank": 0}
-    append_row(
-        cloc_out,
-        ["repo", "files", "code", "comment", "blank"],
-        {"repo": repo_name, **cloc},
-    )
+            return {"files": 0, "code": 0, "comment": 0, "blank": 0}
 
     # CK
-    def _count_java_and_best_root(base: str) -> tuple[int, str]:
-        total = 0
-        counts: dict[str, int] = {}
-        base_norm = os.path.normpath(base)
-        for root, dirs, files in os.walk(base):
-            # prune common build dirs
-            dirs[:] = [d for d in dirs if d not in {'.git', '.gradle', 'target', 'build', 'dist', 'node_modules', 'out', 'coverage'}]
-            jcount = sum(1 for fn in files if fn.lower().endswith('.java'))
-            if jcount:
-                total += jcount
-                # compute top-level segment under base
-                rel = os.path.relpath(root, base_norm)
-                top = rel.split(os.sep)[0] if rel not in ('.', '') else '.'
-                counts[top] = counts.get(top, 0) + jcount
-        # pick best
-        if not total:
-            return 0, base
-        best_top = max(counts.items(), key=lambda kv: kv[1])[0]
-        best_root = base if best_top == '.' else os.path.join(base, best_top)
-        return total, best_root
-
-    if java_exe:
+    def _do_ck() -> dict:
+        if not java_exe:
+            return nan_ck_row
+        # CK's CSVs go to local scratch (tmpfs when available), not into the repo tree
+        ck_tmp = tempfile.mkdtemp(prefix="ck_out_", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
         try:
-            n_java, java_root = _count_java_and_best_root(repo_dir)
-            ck_tmp = os.path.join(repo_dir, "_ck_out_local")
-            ensure_dir(ck_tmp)
-            if n_java == 0:
+            if not has_java:
                 raise RuntimeError("nenhum arquivo .java encontrado; pulando CK")
             class_csv = run_ck(ck_jar, java_root, ck_tmp, java_exe)
             n_classes, cbo_mean, cbo_med, cbo_std, dit_mean, dit_med, dit_std, lcom_mean, lcom_med, lcom_std = summarize_ck_class(class_csv)
-            ck_row = {
+            return {
                 "repo": repo_name,
                 "n_classes": n_classes,
                 "cbo_mean": f"{cbo_mean:.6f}",
@@ -147,33 +271,22 @@ def main() -> int:
             }
         except Exception as e:
             print(f"[CK FAIL] {repo_name}: {e}")
-            ck_row = {
-                "repo": repo_name,
-                "n_classes": 0,
-                "cbo_mean": "nan",
-                "cbo_median": "nan",
-                "cbo_std": "nan",
-                "dit_mean": "nan",
-                "dit_median": "nan",
-                "dit_std": "nan",
-                "lcom_mean": "nan",
-                "lcom_median": "nan",
-                "lcom_std": "nan",
-            }
-    else:
-        ck_row = {
-            "repo": repo_name,
-            "n_classes": 0,
-            "cbo_mean": "nan",
-            "cbo_median": "nan",
-            "cbo_std": "nan",
-            "dit_mean": "nan",
-            "dit_median": "nan",
-            "dit_std": "nan",
-            "lcom_mean": "nan",
-            "lcom_median": "nan",
-            "lcom_std": "nan",
-        }
+            return nan_ck_row
+        finally:
+            shutil.rmtree(ck_tmp, ignore_errors=True)
+
+    # cloc and CK are independent external processes over the same tree: run both at once
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        fut_cloc = ex.submit(_do_cloc)
+        fut_ck = ex.submit(_do_ck)
+        cloc = fut_cloc.result()
+        ck_row = fut_ck.result()
+
+    append_row(
+        cloc_out,
+        ["repo", "files", "code", "comment", "blank"],
+        {"repo": repo_name, **cloc},
+    )
     append_row(
         ck_out,
         [
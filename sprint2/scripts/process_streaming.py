@@ -20,16 +20,75 @@ Notes:
 - Repositórios NÃO ficam armazenados. Cada repo é removido ao final.
 - Use --filter_regex para testar em subconjuntos.
 """
+import atexit
 import csv
+import functools
+import hashlib
+import itertools
+import json
 import os
+import queue
 import re
 import shutil
+import signal
+import sqlite3
 import subprocess
 import sys
 import tempfile
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, Iterable, List, Optional, Tuple
+import uuid
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import closing
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    # Optional: in-process shallow clones via libgit2 (no git fork/exec per repo)
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+try:
+    # Optional: typed, multithreaded parse of CK's class.csv
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = pacsv = None
+
+# Windows: don't allocate a console for each git/cloc/java child process
+NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0) if os.name == "nt" else 0
+# Never let git wait on a credential prompt (private/renamed repos would hang until the timeout)
+GIT_ENV = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+
+
+def _kill_tree(proc: subprocess.Popen) -> None:
+    # git clone spawns remote helpers/index-pack; killing only the direct child would orphan them
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30, creationflags=NO_WINDOW)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except Exception:
+        pass
+    proc.kill()
+
+
+def run_bounded(cmd: List[str], timeout: float, input: Optional[object] = None, **kw) -> subprocess.CompletedProcess:
+    """subprocess.run look-alike that takes down the child's whole process tree
+    on timeout (or Ctrl+C) instead of only the direct child."""
+    if os.name == "nt":
+        kw["creationflags"] = kw.get("creationflags", 0) | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kw["start_new_session"] = True
+    if input is not None:
+        kw["stdin"] = subprocess.PIPE
+    with subprocess.Popen(cmd, **kw) as proc:
+        try:
+            out, err = proc.communicate(input, timeout=timeout)
+        except BaseException:
+            _kill_tree(proc)
+            raise
+    return subprocess.CompletedProcess(proc.args, proc.returncode, out, err)
 
 
 def ensure_dir(path: str) -> None:
@@ -69,6 +128,59 @@ def safe_rmtree(path: str) -> None:
         shutil.rmtree(path, onerror=onerror)
 
 
+_trash_lock = threading.Lock()
+_trash_queue: Optional["queue.Queue[Optional[str]]"] = None
+_trash_thread: Optional[threading.Thread] = None
+_trash_dirs: set = set()
+
+
+def _trash_drainer(q: "queue.Queue[Optional[str]]") -> None:
+    while True:
+        path = q.get()
+        if path is None:
+            return
+        safe_rmtree(path)
+
+
+def _flush_trash() -> None:
+    # Exit hook: let the drainer finish pending deletes, then drop the empty .trash dirs
+    if _trash_thread is not None:
+        _trash_queue.put(None)  # type: ignore[union-attr]
+        _trash_thread.join()
+    for d in _trash_dirs:
+        try:
+            os.rmdir(d)
+        except OSError:
+            pass
+
+
+def discard_tree(path: str) -> None:
+    """Delete a directory tree without waiting for it.
+
+    The tree is renamed into a sibling ``.trash`` dir (a single metadata operation)
+    and removed by a background thread; if the rename fails it is deleted in place.
+    """
+    global _trash_queue, _trash_thread
+    if not os.path.isdir(path):
+        return
+    trash = os.path.join(os.path.dirname(path), ".trash")
+    try:
+        ensure_dir(trash)
+        dest = os.path.join(trash, f"{os.path.basename(path)}-{uuid.uuid4().hex}")
+        os.rename(path, dest)
+    except OSError:
+        safe_rmtree(path)
+        return
+    with _trash_lock:
+        _trash_dirs.add(trash)
+        if _trash_thread is None:
+            _trash_queue = queue.Queue()
+            _trash_thread = threading.Thread(target=_trash_drainer, args=(_trash_queue,), name="trash-drainer", daemon=True)
+            _trash_thread.start()
+            atexit.register(_flush_trash)
+    _trash_queue.put(dest)  # type: ignore[union-attr]
+
+
 def resolve_executable(
     name: str,
     explicit: Optional[str],
@@ -99,29 +211,134 @@ def resolve_executable(
     return None
 
 
+# Paths found by earlier runs with the same work_dir; a hit skips PATH/glob probing entirely
+EXE_CACHE_NAME = "exe_cache.json"
+
+
+def _env_fingerprint() -> str:
+    # A changed PATH or JAVA_HOME may resolve to a different binary, so it gets its own entries
+    env = "\0".join((os.environ.get("PATH", ""), os.environ.get("JAVA_HOME", "")))
+    return hashlib.sha1(env.encode("utf-8", "surrogatepass")).hexdigest()[:12]
+
+
+def _load_exe_cache(cache_path: str) -> dict:
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+@functools.lru_cache(maxsize=None)
+def _exe_cache(cache_path: str) -> dict:
+    return _load_exe_cache(cache_path)
+
+
+def cached_exe_path(key: str, resolve: Callable[[], Optional[str]], cache_path: str) -> Optional[str]:
+    """Return the cached path for key if it still exists, else resolve() and remember it.
+
+    Keys are qualified with a hash of PATH and JAVA_HOME. The file is rewritten
+    atomically, since sharded runs sharing a work_dir may update it concurrently.
+    """
+    full_key = f"{key}|{_env_fingerprint()}"
+    cache = _exe_cache(cache_path)
+    hit = cache.get(full_key)
+    if hit and os.path.isfile(hit):
+        return hit
+    found = resolve()
+    if found:
+        cache[full_key] = found
+        tmp = f"{cache_path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            # Merge with whatever other shards wrote since this process loaded the file
+            merged = _load_exe_cache(cache_path)
+            merged[full_key] = found
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(merged, f, indent=2)
+            os.replace(tmp, cache_path)
+        except OSError:
+            # cache is best-effort
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+    return found
+
+
 def iter_repos(csv_path: str, filter_regex: Optional[str] = None) -> Iterable[Tuple[str, str]]:
-    pat = re.compile(filter_regex) if filter_regex else None
+    search = re.compile(filter_regex).search if filter_regex else None
     # Use utf-8-sig to tolerate BOM from Windows-generated CSVs
     with open(csv_path, encoding="utf-8-sig", newline="") as f:
-        r = csv.DictReader(f)
+        r = csv.reader(f)
+        header = next(r, [])
+        # Column positions resolved once; rows are plain lists (no per-row dict)
+        if "repo" not in header or "url" not in header:
+            return
+        i_name, i_url = header.index("repo"), header.index("url")
+        need = max(i_name, i_url) + 1
         for row in r:
-            name = row.get("repo") or ""
-            url = row.get("url") or ""
+            if len(row) < need:
+                continue
+            name, url = row[i_name], row[i_url]
             if not name or not url:
                 continue
-            if pat and not pat.search(name):
+            if search and not search(name):
                 continue
             yield name, url
 
 
+def _git_sparse_java_clone(url: str, dest: str, git_exe: str) -> Tuple[bool, str]:
+    """Partial clone (no blobs up front) + non-cone sparse checkout of *.java only.
+
+    Requires server-side partial clone support (GitHub has it); only the Java
+    blobs of the tip commit are transferred.
+    """
+    base = [git_exe, "-c", "core.longpaths=true", "-c", "core.autocrlf=false", "-c", "core.fsync=none"]
+    steps = [
+        base + ["-c", "protocol.version=2", "clone", "--depth=1", "--single-branch", "--no-tags",
+                "--filter=blob:none", "--no-checkout", url, dest],
+        base + ["-C", dest, "sparse-checkout", "set", "--no-cone", "*.java"],
+        base + ["-C", dest, "checkout"],
+    ]
+    # git only reports progress/errors on stderr; stdout is not kept
+    for cmd in steps:
+        res = run_bounded(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=900, env=GIT_ENV, creationflags=NO_WINDOW)
+        if res.returncode != 0:
+            return False, res.stderr.decode(errors="ignore").strip()
+    return True, "ok (sparse .java)"
+
+
 def git_shallow_clone(url: str, dest: str, git_exe: str) -> Tuple[bool, str]:
-    cmd = [git_exe, "-c", "core.longpaths=true", "clone", "--depth=1", url, dest]
+    # Java-only sparse mode toggled from main (--java_sparse)
+    if getattr(git_shallow_clone, "_java_sparse", False):
+        try:
+            ok, msg = _git_sparse_java_clone(url, dest, git_exe)
+            if ok:
+                return ok, msg
+        except Exception:
+            pass
+        # Partial clone/sparse-checkout unsupported (server or old git): plain shallow clone below
+        safe_rmtree(dest)
+    if pygit2 is not None:
+        try:
+            pygit2.clone_repository(url, dest, depth=1)
+            return True, "ok (pygit2)"
+        except Exception:
+            # Fall back to the git CLI (e.g. long paths on Windows, old libgit2 without shallow support)
+            safe_rmtree(dest)
+    # --single-branch is implied by --depth; --no-tags skips fetching tag refs
+    # core.autocrlf=false: files are checked out as stored (no per-file EOL conversion; cloc/CK don't care)
+    # core.fsync=none: the clone is deleted right after measuring, so index-pack needn't fsync the pack
+    cmd = [git_exe, "-c", "core.longpaths=true", "-c", "core.autocrlf=false", "-c", "core.fsync=none", "-c", "protocol.version=2", "clone",
+           "--depth=1", "--single-branch", "--no-tags", url, dest]
     try:
-        res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=900)
+        res = run_bounded(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=900, env=GIT_ENV, creationflags=NO_WINDOW)
         if res.returncode == 0:
             return True, "ok"
         else:
-            return False, (res.stderr or res.stdout).decode(errors="ignore").strip()
+            return False, res.stderr.decode(errors="ignore").strip()
     except Exception as e:
         return False, str(e)
 
@@ -147,6 +364,78 @@ def _sanitize_windows_path(rel_path: str) -> str:
     return "/".join(parts)
 
 
+def _extract_blobs(git_exe: str, dest: str, files: List[str], timeout: float = 900) -> int:
+    """Write HEAD's version of each path under dest (sanitized) using a single
+    `git cat-file --batch` process instead of one `git show` per file.
+
+    Like run_bounded, the whole process tree is killed once timeout seconds pass
+    (raising subprocess.TimeoutExpired), so a stalled pipe cannot block forever.
+    """
+    extracted = 0
+    cmd = [git_exe, "-C", dest, "cat-file", "--batch"]
+    kw = {}
+    if os.name == "nt":
+        kw["creationflags"] = NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kw["start_new_session"] = True
+    expired = threading.Event()
+
+    with subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, **kw) as proc:
+        def _expire() -> None:
+            expired.set()
+            _kill_tree(proc)
+
+        # Overall deadline: killing git closes its stdout, which unblocks readline()/read()
+        timer = threading.Timer(timeout, _expire)
+        timer.daemon = True
+        timer.start()
+        try:
+            for fp in files:
+                # One request in flight at a time, so neither pipe can fill up
+                proc.stdin.write(f"HEAD:{fp}\n".encode("utf-8"))
+                proc.stdin.flush()
+                # "<oid> blob <size>" or "<name> missing"; EOF means git exited (or was killed)
+                header = proc.stdout.readline().split()
+                if not header:
+                    break
+                if len(header) != 3 or header[1] != b"blob" or not header[2].isdigit():
+                    continue
+                remaining = int(header[2])
+                san = _sanitize_windows_path(fp)
+                out_fp = os.path.join(dest, *san.split("/"))
+                try:
+                    ensure_dir(os.path.dirname(out_fp))
+                    fout = open(out_fp, "wb")
+                except Exception:
+                    # Skip write errors for pathological paths (the blob is still drained below)
+                    fout = None
+                # Copy the blob in chunks straight to disk (no full-file buffer)
+                while remaining:
+                    chunk = proc.stdout.read(min(remaining, 1 << 20))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    if fout is not None:
+                        fout.write(chunk)
+                proc.stdout.read(1)  # trailing LF
+                if fout is not None:
+                    fout.close()
+                    extracted += 1
+            if expired.is_set():
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            proc.stdin.close()
+            proc.wait(timeout=timeout)
+        except BaseException:
+            _kill_tree(proc)
+            if expired.is_set():
+                # Broken pipe / short read caused by the deadline kill
+                raise subprocess.TimeoutExpired(cmd, timeout) from None
+            raise
+        finally:
+            timer.cancel()
+    return extracted
+
+
 def clone_and_extract_java_only(url: str, dest: str, git_exe: str) -> Tuple[bool, str]:
     """Windows-safe fallback: clone with no checkout and extract only .java files
     into sanitized paths so we can run CLOC/CK even if repo contains invalid filenames.
@@ -157,33 +446,20 @@ def clone_and_extract_java_only(url: str, dest: str, git_exe: str) -> Tuple[bool
         # Fresh dir
         if os.path.isdir(dest):
             safe_rmtree(dest)
-        cmd = [git_exe, "-c", "core.longpaths=true", "clone", "--depth=1", "--no-checkout", url, dest]
-        res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=900)
+        cmd = [git_exe, "-c", "core.longpaths=true", "-c", "core.fsync=none", "-c", "protocol.version=2", "clone", "--depth=1", "--no-tags", "--no-checkout", url, dest]
+        res = run_bounded(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=900, env=GIT_ENV, creationflags=NO_WINDOW)
         if res.returncode != 0:
-            return False, (res.stderr or res.stdout).decode(errors="ignore").strip()
+            return False, res.stderr.decode(errors="ignore").strip()
         # Verify HEAD
-        rev = subprocess.run([git_exe, "-C", dest, "rev-parse", "--verify", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=60)
+        rev = run_bounded([git_exe, "-C", dest, "rev-parse", "--verify", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=60, creationflags=NO_WINDOW)
         if rev.returncode != 0:
             return False, (rev.stderr or rev.stdout).decode(errors="ignore").strip()
         # List tree
-        ls = subprocess.run([git_exe, "-C", dest, "ls-tree", "-r", "--name-only", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=300, text=True, encoding="utf-8", errors="ignore")
+        ls = run_bounded([git_exe, "-C", dest, "ls-tree", "-r", "--name-only", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=300, text=True, encoding="utf-8", errors="ignore", creationflags=NO_WINDOW)
         if ls.returncode != 0:
             return False, (ls.stderr or ls.stdout)
         files = [ln.strip() for ln in ls.stdout.splitlines() if ln.strip().lower().endswith(".java")]
-        extracted = 0
-        for fp in files:
-            san = _sanitize_windows_path(fp)
-            out_fp = os.path.join(dest, *san.split("/"))
-            ensure_dir(os.path.dirname(out_fp))
-            show = subprocess.run([git_exe, "-C", dest, "show", f"HEAD:{fp}"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=120)
-            if show.returncode == 0:
-                try:
-                    with open(out_fp, "wb") as fout:
-                        fout.write(show.stdout)
-                    extracted += 1
-                except Exception:
-                    # Skip write errors for pathological paths
-                    pass
+        extracted = _extract_blobs(git_exe, dest, files)
         if extracted == 0:
             # No Java files extracted, still consider it ok so pipeline can write zeros
             return True, "ok (no .java files)"
@@ -192,9 +468,160 @@ def clone_and_extract_java_only(url: str, dest: str, git_exe: str) -> Tuple[bool
         return False, str(e)
 
 
-def run_cloc_tree(repo_dir: str, cloc_exe: str, java_only: bool = True) -> Dict[str, int]:
+# Common excludes to avoid scanning build artifacts and VCS dirs (built once, not per call)
+CLOC_EXCLUDE_DIRS = (".git", ".gradle", "target", "build", "dist", "node_modules", "out", "coverage")
+CLOC_EXCLUDE_SET = frozenset(CLOC_EXCLUDE_DIRS)
+CLOC_EXCLUDE_ARG = ",".join(CLOC_EXCLUDE_DIRS)
+
+
+# Next token that can change the line's state: a comment opener or a string/char quote
+_JAVA_SPECIAL = re.compile(rb'/[/*]|"|\'')
+_BACKSLASH = ord("\\")
+
+
+def _count_java_lines(buf: bytes) -> Tuple[int, int, int]:
+    """cloc-style (code, comment, blank) line counts for one Java source.
+
+    Blank = whitespace only; comment = only comment text; code = anything else
+    (a line mixing code and a trailing comment is code). String/char literals
+    and text blocks are skipped so "//" or "/*" inside them is not a comment.
+    Works on the raw bytes: every token involved is ASCII, so no decode is needed.
+    """
+    code = comment = blank = 0
+    in_block = in_text = False
+    search = _JAVA_SPECIAL.search
+    for line in buf.splitlines():
+        s = line.strip()
+        if not s:
+            blank += 1
+            continue
+        if not (in_block or in_text):
+            m = search(s)
+            if m is None:
+                # Plain code line (the common case): nothing that can open a comment or literal
+                code += 1
+                continue
+        has_code = False
+        i, n = 0, len(s)
+        while i < n:
+            if in_block:
+                j = s.find(b"*/", i)
+                if j < 0:
+                    break
+                in_block = False
+                i = j + 2
+                continue
+            if in_text:
+                has_code = True
+                j = s.find(b'"""', i)
+                if j < 0:
+                    break
+                in_text = False
+                i = j + 3
+                continue
+            m = search(s, i)
+            if m is None:
+                if not s[i:].isspace():
+                    has_code = True
+                break
+            start = m.start()
+            if start > i and not s[i:start].isspace():
+                has_code = True
+            tok = m.group()
+            if tok == b"//":
+                break
+            if tok == b"/*":
+                in_block = True
+                i = m.end()
+                continue
+            has_code = True
+            if s.startswith(b'"""', start):
+                in_text = True
+                i = start + 3
+                continue
+            # skip the literal, honouring backslash escapes
+            quote = s[start]
+            k = start + 1
+            while k < n:
+                ch = s[k]
+                if ch == _BACKSLASH:
+                    k += 2
+                    continue
+                k += 1
+                if ch == quote:
+                    break
+            i = k
+        if has_code:
+            code += 1
+        else:
+            comment += 1
+    return code, comment, blank
+
+
+def find_java_files(repo_dir: str) -> List[str]:
+    """All *.java paths under repo_dir, pruning CLOC_EXCLUDE_DIRS.
+
+    Iterative scandir: names and entry types come from the directory read itself,
+    without os.walk's per-directory dirs/files lists.
+    """
+    java_files: List[str] = []
+    stack = [repo_dir]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.name in CLOC_EXCLUDE_SET:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith(".java"):
+                    java_files.append(entry.path)
+    return java_files
+
+
+def _java_loc_native(repo_dir: str, java_files: Optional[List[str]] = None) -> Dict[str, int]:
+    """In-process Java LOC count (no cloc subprocess, one pass over the tree)."""
+    if java_files is None:
+        java_files = find_java_files(repo_dir)
+    totals = {"files": 0, "code": 0, "comment": 0, "blank": 0}
+    for fp in java_files:
+        try:
+            with open(fp, "rb") as f:
+                buf = f.read()
+        except OSError:
+            continue
+        code, comment, blank = _count_java_lines(buf)
+        totals["files"] += 1
+        totals["code"] += code
+        totals["comment"] += comment
+        totals["blank"] += blank
+    return totals
+
+
+def cloc_parallel_ok(cloc_exe: str) -> bool:
+    """True if this cloc build accepts --processes (needs Parallel::ForkManager; never on Windows)."""
+    if os.name == "nt":
+        return False
+    probe = tempfile.mkdtemp(prefix="cloc_probe_")
+    try:
+        res = run_bounded([cloc_exe, "--json", "--quiet", "--processes=2", probe], 120,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, creationflags=NO_WINDOW)
+        return res.returncode == 0 and not res.stderr.strip()
+    except (OSError, subprocess.SubprocessError):
+        return False
+    finally:
+        shutil.rmtree(probe, ignore_errors=True)
+
+
+def run_cloc_tree(repo_dir: str, cloc_exe: str, java_only: bool = True, java_files: Optional[List[str]] = None) -> Dict[str, int]:
+    # java_files: caller's already-enumerated *.java paths, reused by fallback 3 instead of re-walking
+    # Native mode (--native_loc): count Java lines in-process, skipping the cloc ladder entirely
+    if java_only and getattr(run_cloc_tree, "_native", False):
+        return _java_loc_native(repo_dir, java_files)
     import json
-    import tempfile as _tmp
     import os as _os
 
     def _parse(res_out: str) -> Dict[str, object]:
@@ -203,25 +630,26 @@ def run_cloc_tree(repo_dir: str, cloc_exe: str, java_only: bool = True) -> Dict[
         except Exception as e:
             raise RuntimeError(f"cloc JSON inválido: {e}")
 
-    # Common excludes to avoid scanning build artifacts and VCS dirs
-    exclude_dirs = [".git", ".gradle", "target", "build", "dist", "node_modules", "out", "coverage"]
-    exclude_arg = ",".join(exclude_dirs)
+    exclude_arg = CLOC_EXCLUDE_ARG
+    # cloc's own fork-based parallelism, sized and probed once in main (--processes=N)
+    n_procs = getattr(run_cloc_tree, "_processes", 0)
+    procs = [f"--processes={n_procs}"] if n_procs > 1 else []
 
     # Extended mode toggles more exhaustive strategies for stubborn repos
     extended = getattr(run_cloc_tree, "_extended", False)
 
     # Attempt 1: filesystem scan with excludes
-    cmd = [cloc_exe, "--json", "--quiet", "--exclude-dir", exclude_arg]
+    cmd = [cloc_exe, "--json", "--quiet", *procs, "--exclude-dir", exclude_arg]
     if java_only:
         cmd += ["--include-lang=Java"]
     cmd += ["."]
-    res = subprocess.run(cmd, cwd=repo_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=1800, text=True, encoding="utf-8", errors="ignore")
+    res = run_bounded(cmd, cwd=repo_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=1800, text=True, encoding="utf-8", errors="ignore", creationflags=NO_WINDOW)
     if res.returncode != 0:
         # Attempt 2: git-based file list (more stable on Windows paths)
-        cmd2 = [cloc_exe, "--json", "--quiet", "--vcs=git", "--exclude-dir", exclude_arg]
+        cmd2 = [cloc_exe, "--json", "--quiet", *procs, "--vcs=git", "--exclude-dir", exclude_arg]
         if java_only:
             cmd2 += ["--include-lang=Java"]
-        res2 = subprocess.run(cmd2, cwd=repo_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=1800, text=True, encoding="utf-8", errors="ignore")
+        res2 = run_bounded(cmd2, cwd=repo_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=1800, text=True, encoding="utf-8", errors="ignore", creationflags=NO_WINDOW)
         if res2.returncode != 0:
             raise RuntimeError((res.stderr or res.stdout or res2.stderr or res2.stdout).strip())
         data = _parse(res2.stdout)
@@ -242,156 +670,131 @@ def run_cloc_tree(repo_dir: str, cloc_exe: str, java_only: bool = True) -> Dict[
 
     # Fallback 3: se Java-only e totais continuam zero, gera file-list com *.java
     if java_only and int(s.get("nFiles", 0) or 0) == 0 and int(s.get("code", 0) or 0) == 0:
-        exclude_dirs = {".git", ".gradle", "target", "build", "dist", "node_modules", "out", "coverage"}
-        java_files: List[str] = []
-        for root, dirs, files in _os.walk(repo_dir):
-            # podar diretórios comuns de build
-            dirs[:] = [d for d in dirs if d not in exclude_dirs]
-            for fn in files:
-                if fn.lower().endswith('.java'):
-                    java_files.append(_os.path.join(root, fn))
+        if java_files is None:
+            java_files = find_java_files(repo_dir)
         if java_files:
-            with _tmp.NamedTemporaryFile('w', delete=False, encoding='utf-8', newline='\n') as lf:
-                for p in java_files:
-                    lf.write(p + "\n")
-                list_path = lf.name
-            try:
-                cmd3 = [cloc_exe, "--json", "--quiet", f"--list-file={list_path}"]
-                res3 = subprocess.run(cmd3, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=1800, text=True, encoding="utf-8", errors="ignore")
-                if res3.returncode == 0:
+            # cloc reads the file list from stdin ("--list-file=-"): no temp list file to create/delete
+            cmd3 = [cloc_exe, "--json", "--quiet", *procs, "--list-file=-"]
+            res3 = run_bounded(cmd3, input="\n".join(java_files) + "\n", stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=1800, text=True, encoding="utf-8", errors="ignore", creationflags=NO_WINDOW)
+            if res3.returncode == 0:
+                try:
+                    data3 = json.loads((res3.stdout or '').strip())
+                except Exception:
+                    data3 = {}
+                s3 = data3.get("SUM", {})
+                if not s3:
+                    totals3 = {"nFiles": 0, "code": 0, "comment": 0, "blank": 0}
+                    for lang, stats in data3.items():
+                        if lang in ("header", "SUM"):
+                            continue
+                        for k in totals3:
+                            v = stats.get(k)
+                            if isinstance(v, int):
+                                totals3[k] += v
+                    s3 = totals3
+                s = s3
+            else:
+                # Fallback da lista falhou: tenta varredura por diretórios com --match-f para *.java
+                # 1) Seleciona raízes de módulos (pais do 'src' quando existir), reduzindo subpaths redundantes
+                roots = set()
+                for fp in java_files:
+                    rp = _os.path.relpath(fp, repo_dir)
+                    parts = rp.replace('\\', '/').split('/')
+                    try:
+                        idx = parts.index('src')
+                        root_rel = '/'.join(parts[:idx]) or '.'
+                    except ValueError:
+                        root_rel = parts[0] if parts and parts[0] not in ('.', '') else '.'
+                    roots.add(root_rel)
+                # remove subpaths redundantes
+                roots = sorted(roots, key=lambda p: (p.count('/'), len(p)))
+                pruned: list[str] = []
+                for r in roots:
+                    if any((r + '/').startswith(p + '/') for p in pruned if p != '.'):
+                        continue
+                    pruned.append(r)
+                if not pruned:
+                    pruned = ['.']
+                # limita quantidade de raízes para performance (mais alto em modo extendido)
+                pruned = pruned[:50] if extended else pruned[:10]
+                # 2) Executa cloc em cada raiz acumulando SUM
+                total = {"nFiles": 0, "code": 0, "comment": 0, "blank": 0}
+                for root in pruned:
+                    cmd4 = [cloc_exe, "--json", "--quiet", *procs, "--match-f=\\.java$", root]
+                    # em modo normal mantém exclusões; no modo extendido escaneia completo
+                    if not extended:
+                        cmd4[3:3] = ["--exclude-dir", exclude_arg]
+                    res4 = run_bounded(cmd4, cwd=repo_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=1800, text=True, encoding="utf-8", errors="ignore", creationflags=NO_WINDOW)
+                    if res4.returncode != 0:
+                        # se alguma raiz falhar, continue; ainda assim podemos obter parciais
+                        continue
                     try:
-                        data3 = json.loads((res3.stdout or '').strip())
+                        data4 = json.loads((res4.stdout or '').strip())
                     except Exception:
-                        data3 = {}
-                    s3 = data3.get("SUM", {})
-                    if not s3:
-                        totals3 = {"nFiles": 0, "code": 0, "comment": 0, "blank": 0}
-                        for lang, stats in data3.items():
+                        data4 = {}
+                    s4 = data4.get("SUM", {})
+                    if not s4:
+                        # agrega manualmente
+                        tmp = {"nFiles": 0, "code": 0, "comment": 0, "blank": 0}
+                        for lang, stats in data4.items():
                             if lang in ("header", "SUM"):
                                 continue
-                            for k in totals3:
+                            for k in tmp:
                                 v = stats.get(k)
                                 if isinstance(v, int):
-                                    totals3[k] += v
-                        s3 = totals3
-                    s = s3
-                else:
-                    # Fallback da lista falhou: tenta varredura por diretórios com --match-f para *.java
-                    # 1) Seleciona raízes de módulos (pais do 'src' quando existir), reduzindo subpaths redundantes
-                    roots = set()
-                    for fp in java_files:
-                        rp = _os.path.relpath(fp, repo_dir)
-                        parts = rp.replace('\\', '/').split('/')
-                        try:
-                            idx = parts.index('src')
-                            root_rel = '/'.join(parts[:idx]) or '.'
-                        except ValueError:
-                            root_rel = parts[0] if parts and parts[0] not in ('.', '') else '.'
-                        roots.add(root_rel)
-                    # remove subpaths redundantes
-                    roots = sorted(roots, key=lambda p: (p.count('/'), len(p)))
-                    pruned: list[str] = []
-                    for r in roots:
-                        if any((r + '/').startswith(p + '/') for p in pruned if p != '.'):
-                            continue
-                        pruned.append(r)
-                    if not pruned:
-                        pruned = ['.']
-                    # limita quantidade de raízes para performance (mais alto em modo extendido)
-                    pruned = pruned[:50] if extended else pruned[:10]
-                    # 2) Executa cloc em cada raiz acumulando SUM
-                    total = {"nFiles": 0, "code": 0, "comment": 0, "blank": 0}
-                    for root in pruned:
-                        cmd4 = [cloc_exe, "--json", "--quiet", "--match-f=\\.java$", root]
-                        # em modo normal mantém exclusões; no modo extendido escaneia completo
-                        if not extended:
-                            cmd4[3:3] = ["--exclude-dir", exclude_arg]
-                        res4 = subprocess.run(cmd4, cwd=repo_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=1800, text=True, encoding="utf-8", errors="ignore")
-                        if res4.returncode != 0:
-                            # se alguma raiz falhar, continue; ainda assim podemos obter parciais
-                            continue
+                                    tmp[k] += v
+                        s4 = tmp
+                    for k in total:
+                        total[k] += int(s4.get(k, 0) or 0)
+                s = total
+                # Último recurso no modo extendido: varrer árvore inteira com --match-f sem exclusões
+                if extended and (int(s.get("nFiles", 0) or 0) == 0 and int(s.get("code", 0) or 0) == 0):
+                    cmd5 = [cloc_exe, "--json", "--quiet", *procs, "--match-f=\\.java$", "."]
+                    res5 = run_bounded(cmd5, cwd=repo_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=1800, text=True, encoding="utf-8", errors="ignore", creationflags=NO_WINDOW)
+                    if res5.returncode == 0:
                         try:
-                            data4 = json.loads((res4.stdout or '').strip())
+                            data5 = json.loads((res5.stdout or '').strip())
                         except Exception:
-                            data4 = {}
-                        s4 = data4.get("SUM", {})
-                        if not s4:
-                            # agrega manualmente
-                            tmp = {"nFiles": 0, "code": 0, "comment": 0, "blank": 0}
-                            for lang, stats in data4.items():
+                            data5 = {}
+                        s5 = data5.get("SUM", {})
+                        if not s5:
+                            totals5 = {"nFiles": 0, "code": 0, "comment": 0, "blank": 0}
+                            for lang, stats in data5.items():
                                 if lang in ("header", "SUM"):
                                     continue
-                                for k in tmp:
+                                for k in totals5:
                                     v = stats.get(k)
                                     if isinstance(v, int):
-                                        tmp[k] += v
-                            s4 = tmp
-                        for k in total:
-                            total[k] += int(s4.get(k, 0) or 0)
-                    s = total
-                    # Último recurso no modo extendido: varrer árvore inteira com --match-f sem exclusões
-                    if extended and (int(s.get("nFiles", 0) or 0) == 0 and int(s.get("code", 0) or 0) == 0):
-                        cmd5 = [cloc_exe, "--json", "--quiet", "--match-f=\\.java$", "."]
-                        res5 = subprocess.run(cmd5, cwd=repo_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=1800, text=True, encoding="utf-8", errors="ignore")
-                        if res5.returncode == 0:
+                                        totals5[k] += v
+                            s5 = totals5
+                        s = s5
+                # Fallback extendido adicional: quebrar lista de arquivos em chunks e somar resultados
+                if extended and (int(s.get("nFiles", 0) or 0) == 0 and int(s.get("code", 0) or 0) == 0) and java_files:
+                    chunk_total = {"nFiles": 0, "code": 0, "comment": 0, "blank": 0}
+                    CHUNK = 2000
+                    for i in range(0, len(java_files), CHUNK):
+                        chunk = java_files[i:i+CHUNK]
+                        cmd6 = [cloc_exe, "--json", "--quiet", *procs, "--list-file=-"]
+                        res6 = run_bounded(cmd6, input="\n".join(chunk) + "\n", stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=1800, text=True, encoding="utf-8", errors="ignore", creationflags=NO_WINDOW)
+                        if res6.returncode == 0:
                             try:
-                                data5 = json.loads((res5.stdout or '').strip())
+                                data6 = json.loads((res6.stdout or '').strip())
                             except Exception:
-                                data5 = {}
-                            s5 = data5.get("SUM", {})
-                            if not s5:
-                                totals5 = {"nFiles": 0, "code": 0, "comment": 0, "blank": 0}
-                                for lang, stats in data5.items():
+                                data6 = {}
+                            s6 = data6.get("SUM", {})
+                            if not s6:
+                                tmp6 = {"nFiles": 0, "code": 0, "comment": 0, "blank": 0}
+                                for lang, stats in data6.items():
                                     if lang in ("header", "SUM"):
                                         continue
-                                    for k in totals5:
+                                    for k in tmp6:
                                         v = stats.get(k)
                                         if isinstance(v, int):
-                                            totals5[k] += v
-                                s5 = totals5
-                            s = s5
-                    # Fallback extendido adicional: quebrar lista de arquivos em chunks e somar resultados
-                    if extended and (int(s.get("nFiles", 0) or 0) == 0 and int(s.get("code", 0) or 0) == 0) and java_files:
-                        chunk_total = {"nFiles": 0, "code": 0, "comment": 0, "blank": 0}
-                        CHUNK = 2000
-                        for i in range(0, len(java_files), CHUNK):
-                            chunk = java_files[i:i+CHUNK]
-                            with _tmp.NamedTemporaryFile('w', delete=False, encoding='utf-8', newline='\n') as lf2:
-                                for p in chunk:
-                                    lf2.write(p + "\n")
-                                list2 = lf2.name
-                            try:
-                                cmd6 = [cloc_exe, "--json", "--quiet", f"--list-file={list2}"]
-                                res6 = subprocess.run(cmd6, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=1800, text=True, encoding="utf-8", errors="ignore")
-                                if res6.returncode == 0:
-                                    try:
-                                        data6 = json.loads((res6.stdout or '').strip())
-                                    except Exception:
-                                        data6 = {}
-                                    s6 = data6.get("SUM", {})
-                                    if not s6:
-                                        tmp6 = {"nFiles": 0, "code": 0, "comment": 0, "blank": 0}
-                                        for lang, stats in data6.items():
-                                            if lang in ("header", "SUM"):
-                                                continue
-                                            for k in tmp6:
-                                                v = stats.get(k)
-                                                if isinstance(v, int):
-                                                    tmp6[k] += v
-                                        s6 = tmp6
-                                    for k in chunk_total:
-                                        chunk_total[k] += int(s6.get(k, 0) or 0)
-                            finally:
-                                try:
-                                    _os.remove(list2)
-                                except Exception:
-                                    pass
-                        s = chunk_total
-            finally:
-                try:
-                    _os.remove(list_path)
-                except Exception:
-                    pass
+                                            tmp6[k] += v
+                                s6 = tmp6
+                            for k in chunk_total:
+                                chunk_total[k] += int(s6.get(k, 0) or 0)
+                    s = chunk_total
     return {
         "files": int(s.get("nFiles", 0) or 0),
         "code": int(s.get("code", 0) or 0),
@@ -400,7 +803,55 @@ def run_cloc_tree(repo_dir: str, cloc_exe: str, java_only: bool = True) -> Dict[
     }
 
 
-def run_ck(ck_jar: str, repo_dir: str, out_dir: str, java_exe: str, jvm_xms: str = "256m", jvm_xmx: str = "1024m") -> str:
+def _has_java(repo_dir: str, git_exe: str) -> bool:
+    """True if the checkout tracks any .java file (read from the git index, no tree walk).
+
+    Only meaningful for checked-out clones: the java-only extraction fallback clones
+    with --no-checkout (empty index), so callers must not use it on those trees.
+    A git error counts as having Java.
+    """
+    try:
+        res = run_bounded([git_exe, "-C", repo_dir, "ls-files", "-z", "--", "*.java"], 300,
+                          stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=GIT_ENV, creationflags=NO_WINDOW)
+    except (OSError, subprocess.SubprocessError):
+        return True
+    return res.returncode != 0 or bool(res.stdout)
+
+
+def build_ck_archive(ck_jar: str, java_exe: str, archive: str) -> Optional[str]:
+    """Gera (uma vez) um arquivo AppCDS com as classes que o CK carrega.
+
+    Roda o CK sobre um projeto de uma classe só com -XX:ArchiveClassesAtExit (JDK 13+).
+    Retorna o caminho do arquivo, ou None se a JVM não suportar/falhar (CK roda sem ele).
+    """
+    try:
+        if os.path.getmtime(archive) >= os.path.getmtime(ck_jar):
+            return archive
+    except OSError:
+        pass
+    probe = tempfile.mkdtemp(prefix="ck_cds_")
+    # Dump to a private name and rename: concurrent shards never see a half-written archive
+    tmp_archive = f"{archive}.{os.getpid()}"
+    try:
+        with open(os.path.join(probe, "Probe.java"), "w", encoding="utf-8") as f:
+            f.write("class Probe { int x; int get() { return x; } }\n")
+        cmd = [java_exe, f"-XX:ArchiveClassesAtExit={tmp_archive}", "-jar", ck_jar, probe, "true", "0", "false"]
+        res = run_bounded(cmd, 600, cwd=probe, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=NO_WINDOW)
+        if res.returncode != 0 or not os.path.isfile(tmp_archive):
+            return None
+        os.replace(tmp_archive, archive)
+        return archive
+    except (OSError, subprocess.SubprocessError):
+        return None
+    finally:
+        shutil.rmtree(probe, ignore_errors=True)
+        try:
+            os.remove(tmp_archive)
+        except OSError:
+            pass
+
+
+def run_ck(ck_jar: str, repo_dir: str, out_dir: str, java_exe: str, jvm_xms: str = "256m", jvm_xmx: str = "1024m", cds_archive: Optional[str] = None) -> str:
     """Executa CK e garante que class.csv exista em out_dir.
 
     Melhorias:
@@ -458,11 +909,21 @@ def run_ck(ck_jar: str, repo_dir: str, out_dir: str, java_exe: str, jvm_xms: str
     jvm_opts: List[str] = [f"-Xms{jvm_xms}", f"-Xmx{jvm_xmx}"]
     if os.path.isfile(log4j_prop):
         jvm_opts.append(f"-Dlog4j.configuration=file:{log4j_prop}")
+    if cds_archive:
+        # Classes come pre-parsed from the archive; -Xshare:auto silently ignores a stale one
+        jvm_opts += ["-Xshare:auto", f"-XX:SharedArchiveFile={cds_archive}"]
 
     def _invoke(path: str) -> Tuple[int, bytes, bytes]:
         cmd = [java_exe, *jvm_opts, "-jar", ck_jar, path, "true", "0", "false"]
-        res = subprocess.run(cmd, cwd=out_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=3600)
-        return res.returncode, res.stdout, res.stderr
+        # CK's log4j chatter can reach many MB on big repos: spool it to disk, keep only the tail on failure
+        log_path = os.path.join(out_dir, "ck_stdout.log")
+        with open(log_path, "w+b") as log:
+            res = run_bounded(cmd, cwd=out_dir, stdout=log, stderr=subprocess.PIPE, timeout=3600, creationflags=NO_WINDOW)
+            out = b""
+            if res.returncode != 0:
+                log.seek(max(0, log.tell() - 8192))
+                out = log.read()
+        return res.returncode, out, res.stderr
 
     def _try_move_fallback(src_root: str) -> None:
         # alguns CK gravam class.csv no diretório do projeto
@@ -504,75 +965,138 @@ def run_ck(ck_jar: str, repo_dir: str, out_dir: str, java_exe: str, jvm_xms: str
     return class_csv
 
 
-def parse_float_safe(s: str) -> Optional[float]:
+def _read_ck_metrics_arrow(class_csv: str, cols: Tuple[Optional[str], ...], used: List[str]):
+    # CK writes plain integers/decimals, so Arrow's multithreaded reader can parse the
+    # metric columns straight to float64 (empty/NaN cells -> null -> NaN); returns None
+    # when some cell is not numeric, leaving the lenient pandas path to handle it
+    import numpy as np
     try:
-        return float(s)
-    except Exception:
+        # Parsed in place from a memory map: no Python-side copy of the file
+        with pa.memory_map(class_csv, "r") as src:
+            tbl = pacsv.read_csv(
+                src,
+                convert_options=pacsv.ConvertOptions(
+                    include_columns=used,
+                    column_types={c: pa.float64() for c in used},
+                ),
+            )
+    except pa.ArrowInvalid:
         return None
+    m = np.full((tbl.num_rows, 3), np.nan)
+    for j, col in enumerate(cols):
+        if col:
+            m[:, j] = tbl.column(col).to_numpy()
+    return m
 
 
 def summarize_ck_class(class_csv: str) -> Tuple[int, float, float, float, float, float, float, float, float]:
     # Retorna: n_classes, cbo_mean, cbo_med, cbo_std, dit_mean, dit_med, dit_std, lcom_mean, lcom_med, lcom_std
-    import math
-    vals_cbo: List[float] = []
-    vals_dit: List[float] = []
-    vals_lcom: List[float] = []
-    with open(class_csv, encoding="utf-8", newline="") as f:
-        r = csv.DictReader(f)
-        fields = [fn.lower() for fn in (r.fieldnames or [])]
-        def pick(*cands: str) -> Optional[str]:
-            for c in cands:
-                if c.lower() in fields:
-                    return r.fieldnames[fields.index(c.lower())]  # type: ignore[index]
-            return None
-        c_cbo = pick("cbo", "cbomodified")
-        c_dit = pick("dit")
-        c_lcom = pick("lcom", "lcom*", "lcomstar", "lcoms")
-        for row in r:
-            if c_cbo:
-                v = parse_float_safe(row.get(c_cbo, ""))
-                if v is not None:
-                    vals_cbo.append(v)
-            if c_dit:
-                v = parse_float_safe(row.get(c_dit, ""))
-                if v is not None:
-                    vals_dit.append(v)
-            if c_lcom:
-                v = parse_float_safe(row.get(c_lcom, ""))
-                if v is not None:
-                    vals_lcom.append(v)
-    def stats(a: List[float]) -> Tuple[float, float, float]:
-        if not a:
-            return float("nan"), float("nan"), float("nan")
-        n = len(a)
-        mean = sum(a) / n
-        s = sorted(a)
-        med = s[n//2] if n % 2 else 0.5*(s[n//2-1] + s[n//2])
-        if n < 2:
-            std = 0.0
-        else:
-            var = sum((x-mean)**2 for x in a)/(n-1)
-            std = math.sqrt(var if var > 0 else 0.0)
-        return mean, med, std
-    cbo_mean, cbo_med, cbo_std = stats(vals_cbo)
-    dit_mean, dit_med, dit_std = stats(vals_dit)
-    lcom_mean, lcom_med, lcom_std = stats(vals_lcom)
-    n_classes = len(vals_cbo) or len(vals_dit) or len(vals_lcom)
+    import numpy as np
+    import pandas as pd
+    if os.path.getsize(class_csv) == 0:
+        # run_ck accepts an existing empty class.csv: no classes, every metric NaN
+        nan = float("nan")
+        return 0, nan, nan, nan, nan, nan, nan, nan, nan, nan
+    header = list(pd.read_csv(class_csv, nrows=0, encoding="utf-8").columns)
+    fields = [fn.lower() for fn in header]
+    def pick(*cands: str) -> Optional[str]:
+        for c in cands:
+            if c.lower() in fields:
+                return header[fields.index(c.lower())]
+        return None
+    c_cbo = pick("cbo", "cbomodified")
+    c_dit = pick("dit")
+    c_lcom = pick("lcom", "lcom*", "lcomstar", "lcoms")
+    # Only the three metric columns are parsed, into one (n, 3) float64 matrix
+    # (NaN = missing/invalid cell); every statistic is a single column-wise reduction
+    cols = (c_cbo, c_dit, c_lcom)
+    used = [c for c in dict.fromkeys(cols) if c]
+    m = _read_ck_metrics_arrow(class_csv, cols, used) if used and pacsv is not None else None
+    if m is None:
+        # Lenient path: any cell that is not a number becomes NaN
+        df = pd.read_csv(class_csv, usecols=used, dtype=str, keep_default_na=False, encoding="utf-8") if used else pd.DataFrame()
+        m = np.full((len(df), 3), np.nan)
+        for j, col in enumerate(cols):
+            if col:
+                m[:, j] = pd.to_numeric(df[col].str.strip(), errors="coerce").to_numpy(dtype="float64")
+    counts = np.count_nonzero(~np.isnan(m), axis=0)
+    with warnings.catch_warnings():
+        # All-NaN columns (metric absent or empty file) simply yield NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        means = np.nanmean(m, axis=0)
+        meds = np.nanmedian(m, axis=0)
+        stds = np.nanstd(m, axis=0, ddof=1)
+    stds[counts == 1] = 0.0
+    cbo_mean, dit_mean, lcom_mean = means.tolist()
+    cbo_med, dit_med, lcom_med = meds.tolist()
+    cbo_std, dit_std, lcom_std = stds.tolist()
+    n_classes = int(counts[0] or counts[1] or counts[2])
     return n_classes, cbo_mean, cbo_med, cbo_std, dit_mean, dit_med, dit_std, lcom_mean, lcom_med, lcom_std
 
 
+def _close_append_handles() -> None:
+    for f, _ in getattr(append_row, "_handles", {}).values():
+        try:
+            f.close()
+        except Exception:
+            pass
+
+
 def append_row(path: str, fieldnames: List[str], row: Dict[str, object]) -> None:
     # Single-writer lock so multiple workers don't interleave writes
     if not hasattr(append_row, "_lock"):
         append_row._lock = threading.Lock()  # type: ignore[attr-defined]
+        # One long-lived handle per output CSV instead of open/close per row
+        append_row._handles = {}  # type: ignore[attr-defined]
+        atexit.register(_close_append_handles)
     with append_row._lock:  # type: ignore[attr-defined]
-        ensure_dir(os.path.dirname(path))
-        file_exists = os.path.isfile(path) and os.path.getsize(path) > 0
-        with open(path, "a", newline="", encoding="utf-8") as f:
+        entry = append_row._handles.get(path)  # type: ignore[attr-defined]
+        if entry is None:
+            ensure_dir(os.path.dirname(path))
+            try:
+                file_exists = os.stat(path).st_size > 0
+            except OSError:
+                file_exists = False
+            f = open(path, "a", newline="", encoding="utf-8", buffering=1 << 20)
             w = csv.DictWriter(f, fieldnames=fieldnames)
             if not file_exists:
                 w.writeheader()
-            w.writerow({k: row.get(k) for k in fieldnames})
+            entry = append_row._handles[path] = (f, w)  # type: ignore[attr-defined]
+        f, w = entry
+        w.writerow({k: row.get(k) for k in fieldnames})
+        # Rows stay visible on disk as they are produced (resumable runs, crashes)
+        f.flush()
+
+
+def remote_head(url: str, git_exe: str) -> Optional[str]:
+    """SHA of the remote HEAD via `git ls-remote` (no clone); None if unreachable."""
+    try:
+        res = run_bounded([git_exe, "ls-remote", url, "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=60, env=GIT_ENV, creationflags=NO_WINDOW)
+    except Exception:
+        return None
+    parts = res.stdout.split()
+    if res.returncode != 0 or not parts:
+        return None
+    return parts[0].decode("ascii", errors="ignore")
+
+
+def _cache_db(path: str) -> sqlite3.Connection:
+    db = sqlite3.connect(path, timeout=60)
+    db.execute("CREATE TABLE IF NOT EXISTS results (repo TEXT, sha TEXT, rows TEXT, ts REAL, PRIMARY KEY (repo, sha))")
+    return db
+
+
+def cache_get(path: str, repo: str, sha: str) -> Optional[List[Tuple[str, List[str], Dict[str, object]]]]:
+    """Rows cached for (repo, sha) as (kind, fieldnames, row); kind is "cloc" or "ck"."""
+    with closing(_cache_db(path)) as db:
+        hit = db.execute("SELECT rows FROM results WHERE repo = ? AND sha = ?", (repo, sha)).fetchone()
+    return json.loads(hit[0]) if hit else None
+
+
+def cache_put(path: str, repo: str, sha: str, rows: List[Tuple[str, List[str], Dict[str, object]]]) -> None:
+    import time
+    with closing(_cache_db(path)) as db, db:
+        db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (repo, sha, json.dumps(rows), time.time()))
 
 
 def process_one(
@@ -589,15 +1113,41 @@ def process_one(
     skip_cloc: bool = False,
     skip_ck: bool = False,
     keep_temp: bool = False,
+    emit: Optional[Callable[[str, List[str], Dict[str, object]], None]] = None,
 ) -> bool:
+    # emit receives each summary row; defaults to appending straight to the CSVs
+    emit = emit or append_row
     print(f"[{idx}] Processando {name}...")
+    # Pool workers get a private subtree (see _init_worker) so their create/delete churn doesn't share a directory
+    work_parent = getattr(process_one, "_worker_root", None) or work_parent
     repo_dir = os.path.join(work_parent, name.replace('/', '__'))
+    # Result cache keyed by (repo, remote HEAD sha), enabled from main (--cache)
+    cache_path = getattr(process_one, "_cache", None)
+    sha = remote_head(url, git_exe) if cache_path and not (skip_cloc or skip_ck) else None
+    if sha and getattr(run_cloc_tree, "_native", False):
+        # Native and cloc LOC counts are not interchangeable: keep them under separate keys
+        sha += ":native"
+    if sha:
+        try:
+            cached = cache_get(cache_path, name, sha)
+        except sqlite3.Error:
+            cached = None
+        if cached:
+            for kind, fields, row in cached:
+                emit(cloc_out if kind == "cloc" else ck_out, fields, row)
+            print(f"[CACHE] {name} @ {sha[:12]}")
+            return True
+    # Rows of this run, cached only if nothing failed or was unavailable
+    produced: List[Tuple[str, List[str], Dict[str, object]]] = []
+    clean = True
     try:
         # Cleanup any leftover dir
         if os.path.isdir(repo_dir):
             safe_rmtree(repo_dir)
 
         ok, msg = git_shallow_clone(url, repo_dir, git_exe)
+        # Set when the .java files were extracted by hand (no checkout, empty index)
+        extracted_tree = False
         if not ok:
             # Fallback: Windows-safe .java-only extraction for repos with invalid paths
             print(f"[CLONE FAIL] {name}: {msg}")
@@ -606,28 +1156,29 @@ def process_one(
             if not ok2:
                 print(f"[CLONE RETRY FAIL] {name}: {msg2}")
                 return False
+            extracted_tree = True
 
         # cloc
         if skip_cloc:
             print(f"[CLOC SKIP] {name}: skip_cloc flag enabled")
-        elif cloc_exe:
+        elif cloc_exe or getattr(run_cloc_tree, "_native", False):
             try:
                 cloc = run_cloc_tree(repo_dir, cloc_exe, java_only=True)
-                append_row(
-                    cloc_out,
-                    ["repo", "files", "code", "comment", "blank"],
-                    {"repo": name, **cloc},
-                )
+                cloc_row = {"repo": name, **cloc}
+                emit(cloc_out, ["repo", "files", "code", "comment", "blank"], cloc_row)
+                produced.append(("cloc", ["repo", "files", "code", "comment", "blank"], cloc_row))
             except Exception as e:
+                clean = False
                 print(f"[CLOC FAIL] {name}: {e}")
-                append_row(
+                emit(
                     cloc_out,
                     ["repo", "files", "code", "comment", "blank"],
                     {"repo": name, "files": 0, "code": 0, "comment": 0, "blank": 0},
                 )
         else:
+            clean = False
             print(f"[CLOC SKIP] {name}: cloc não disponível")
-            append_row(
+            emit(
                 cloc_out,
                 ["repo", "files", "code", "comment", "blank"],
                 {"repo": name, "files": 0, "code": 0, "comment": 0, "blank": 0},
@@ -636,36 +1187,48 @@ def process_one(
         # CK
         if skip_ck:
             print(f"[CK SKIP] {name}: skip_ck flag enabled")
+        elif java_exe and not extracted_tree and not _has_java(repo_dir, git_exe):
+            # CK would only write an empty class.csv: record that row without starting a JVM
+            print(f"[CK SKIP] {name}: nenhum arquivo .java")
+            ck_fields = [
+                "repo", "n_classes",
+                "cbo_mean", "cbo_median", "cbo_std",
+                "dit_mean", "dit_median", "dit_std",
+                "lcom_mean", "lcom_median", "lcom_std",
+            ]
+            ck_row = {"repo": name, "n_classes": 0, **dict.fromkeys(ck_fields[2:], "nan")}
+            emit(ck_out, ck_fields, ck_row)
+            produced.append(("ck", ck_fields, ck_row))
         elif java_exe:
             try:
                 ck_tmp = os.path.join(repo_dir, "_ck_out")
-                class_csv = run_ck(ck_jar, repo_dir, ck_tmp, java_exe, jvm_xms=process_one._ck_xms, jvm_xmx=process_one._ck_xmx)  # type: ignore[attr-defined]
+                class_csv = run_ck(ck_jar, repo_dir, ck_tmp, java_exe, jvm_xms=process_one._ck_xms, jvm_xmx=process_one._ck_xmx, cds_archive=getattr(process_one, "_ck_cds", None))  # type: ignore[attr-defined]
                 n_classes, cbo_mean, cbo_med, cbo_std, dit_mean, dit_med, dit_std, lcom_mean, lcom_med, lcom_std = summarize_ck_class(class_csv)
-                append_row(
-                    ck_out,
-                    [
-                        "repo", "n_classes",
-                        "cbo_mean", "cbo_median", "cbo_std",
-                        "dit_mean", "dit_median", "dit_std",
-                        "lcom_mean", "lcom_median", "lcom_std",
-                    ],
-                    {
-                        "repo": name,
-                        "n_classes": n_classes,
-                        "cbo_mean": f"{cbo_mean:.6f}",
-                        "cbo_median": f"{cbo_med:.6f}",
-                        "cbo_std": f"{cbo_std:.6f}",
-                        "dit_mean": f"{dit_mean:.6f}",
-                        "dit_median": f"{dit_med:.6f}",
-                        "dit_std": f"{dit_std:.6f}",
-                        "lcom_mean": f"{lcom_mean:.6f}",
-                        "lcom_median": f"{lcom_med:.6f}",
-                        "lcom_std": f"{lcom_std:.6f}",
-                    },
-                )
+                ck_fields = [
+                    "repo", "n_classes",
+                    "cbo_mean", "cbo_median", "cbo_std",
+                    "dit_mean", "dit_median", "dit_std",
+                    "lcom_mean", "lcom_median", "lcom_std",
+                ]
+                ck_row = {
+                    "repo": name,
+                    "n_classes": n_classes,
+                    "cbo_mean": f"{cbo_mean:.6f}",
+                    "cbo_median": f"{cbo_med:.6f}",
+                    "cbo_std": f"{cbo_std:.6f}",
+                    "dit_mean": f"{dit_mean:.6f}",
+                    "dit_median": f"{dit_med:.6f}",
+                    "dit_std": f"{dit_std:.6f}",
+                    "lcom_mean": f"{lcom_mean:.6f}",
+                    "lcom_median": f"{lcom_med:.6f}",
+                    "lcom_std": f"{lcom_std:.6f}",
+                }
+                emit(ck_out, ck_fields, ck_row)
+                produced.append(("ck", ck_fields, ck_row))
             except Exception as e:
+                clean = False
                 print(f"[CK FAIL] {name}: {e}")
-                append_row(
+                emit(
                     ck_out,
                     [
                         "repo", "n_classes",
@@ -688,8 +1251,9 @@ def process_one(
                     },
                 )
         else:
+            clean = False
             print(f"[CK SKIP] {name}: java não disponível")
-            append_row(
+            emit(
                 ck_out,
                 [
                     "repo", "n_classes",
@@ -711,17 +1275,51 @@ def process_one(
                     "lcom_std": "nan",
                 },
             )
+        if sha and clean:
+            try:
+                cache_put(cache_path, name, sha, produced)
+            except sqlite3.Error as e:
+                print(f"[CACHE FAIL] {name}: {e}")
         print(f"[OK] {name}")
         return True
     finally:
-        # Delete repo unless keep_temp is requested (debug/deep-dive)
+        # Delete repo unless keep_temp is requested (debug/deep-dive); the next repo
+        # can start cloning while the background drainer removes this one
         if not keep_temp:
             try:
-                safe_rmtree(repo_dir)
+                discard_tree(repo_dir)
             except Exception:
                 pass
 
 
+def _init_worker(ck_xms: str, ck_xmx: str, ck_cds: Optional[str], cloc_extended: bool, cloc_processes: int, java_sparse: bool, native_loc: bool, cache_path: Optional[str], work_parent: str) -> None:
+    # Worker processes don't inherit the flags main() stashes on the functions (spawn on Windows)
+    # Line-buffered output: each progress line reaches a redirected log as one write,
+    # so lines from different workers don't get split into each other
+    try:
+        sys.stdout.reconfigure(line_buffering=True)  # type: ignore[attr-defined]
+    except Exception:
+        pass
+    process_one._ck_xms = ck_xms  # type: ignore[attr-defined]
+    process_one._ck_xmx = ck_xmx  # type: ignore[attr-defined]
+    process_one._ck_cds = ck_cds  # type: ignore[attr-defined]
+    process_one._cache = cache_path  # type: ignore[attr-defined]
+    worker_root = os.path.join(work_parent, f"w-{os.getpid()}")
+    ensure_dir(worker_root)
+    process_one._worker_root = worker_root  # type: ignore[attr-defined]
+    run_cloc_tree._extended = cloc_extended  # type: ignore[attr-defined]
+    run_cloc_tree._processes = cloc_processes  # type: ignore[attr-defined]
+    run_cloc_tree._native = native_loc  # type: ignore[attr-defined]
+    git_shallow_clone._java_sparse = java_sparse  # type: ignore[attr-defined]
+
+
+def _process_one_collect(*args) -> Tuple[bool, List[Tuple[str, List[str], Dict[str, object]]]]:
+    """process_one for a worker process: rows are returned to the parent, which is the single CSV writer."""
+    rows: List[Tuple[str, List[str], Dict[str, object]]] = []
+    ok = process_one(*args, emit=lambda path, fields, row: rows.append((path, fields, row)))
+    return ok, rows
+
+
 def main() -> int:
     import argparse
     p = argparse.ArgumentParser(description="Streaming: clone, medir cloc/CK, salvar sumários e deletar repo")
@@ -738,13 +1336,18 @@ def main() -> int:
     p.add_argument("--filter_regex", type=str, default=None, help="Processa apenas repositórios cujo 'owner/repo' casa com regex")
     p.add_argument("--keep_temp", action="store_true", help="Não deletar pasta temporária do repo (debug)")
     p.add_argument("--workers", type=int, default=1, help="Número de repositórios processados em paralelo")
+    p.add_argument("--processes", action="store_true", help="Usa processos (um por worker) em vez de threads; as linhas são gravadas pelo processo principal")
     p.add_argument("--shard_mod", type=int, default=1, help="Divisor para sharding por índice global (ex.: 3)")
     p.add_argument("--shard_idx", type=int, default=0, help="Índice deste shard no intervalo [0, shard_mod)")
     p.add_argument("--skip_ck", action="store_true", help="Pular execução do CK (apenas CLOC)")
     p.add_argument("--skip_cloc", action="store_true", help="Pular execução do CLOC (apenas CK)")
     p.add_argument("--ck_xms", type=str, default="256m", help="Memória inicial da JVM para CK (ex.: 256m)")
     p.add_argument("--ck_xmx", type=str, default="1024m", help="Memória máxima da JVM para CK (ex.: 1024m ou 2g)")
+    p.add_argument("--ck_cds", action="store_true", help="Gera uma vez um arquivo AppCDS (JDK 13+) e o reutiliza em cada JVM do CK, reduzindo o tempo de partida")
     p.add_argument("--cloc_extended", action="store_true", help="Ativa varreduras mais exaustivas do CLOC para casos problemáticos")
+    p.add_argument("--native_loc", action="store_true", help="Conta LOC Java em processo (sem cloc); números podem diferir levemente do cloc")
+    p.add_argument("--cache", action="store_true", help="Reaproveita resultados de repositórios cujo HEAD remoto não mudou (cache SQLite em out_dir)")
+    p.add_argument("--java_sparse", action="store_true", help="Clone parcial (--filter=blob:none) com sparse-checkout apenas de *.java")
     args = p.parse_args()
 
     try:
@@ -764,59 +1367,63 @@ def main() -> int:
     # Resolver executáveis (robusto em Windows)
     is_windows = os.name == "nt"
     java_home = os.environ.get("JAVA_HOME")
-    java_candidates: List[str] = []
-    if java_home:
-        java_candidates.append(os.path.join(java_home, "bin", "java.exe" if is_windows else "java"))
-    # Common install locations
-    if is_windows:
-        java_candidates += [
-            r"C:\\Program Files\\Eclipse Adoptium\\jdk-21*\\bin\\java.exe",
-            r"C:\\Program Files\\Eclipse Adoptium\\jdk-17*\\bin\\java.exe",
-            r"C:\\Program Files\\Java\\jdk*\\bin\\java.exe",
-            r"C:\\Program Files\\Microsoft\\jdk*\\bin\\java.exe",
-        ]
-        # Expand globs
-        expanded: List[str] = []
-        import glob as _glob
-        for pat in java_candidates:
-            if "*" in pat:
-                expanded += _glob.glob(pat)
-            else:
-                expanded.append(pat)
-        java_candidates = expanded
-
-    git_candidates = []
-    if is_windows:
-        git_candidates = [
-            r"C:\\Program Files\\Git\\bin\\git.exe",
-            r"C:\\Program Files\\Git\\cmd\\git.exe",
-            r"C:\\Program Files (x86)\\Git\\bin\\git.exe",
-            r"C:\\Program Files (x86)\\Git\\cmd\\git.exe",
-        ]
 
-    cloc_candidates = []
-    if is_windows:
+    def _find_java() -> Optional[str]:
+        java_candidates: List[str] = []
+        if java_home:
+            java_candidates.append(os.path.join(java_home, "bin", "java.exe" if is_windows else "java"))
+        # Common install locations
+        if is_windows:
+            java_candidates += [
+                r"C:\\Program Files\\Eclipse Adoptium\\jdk-21*\\bin\\java.exe",
+                r"C:\\Program Files\\Eclipse Adoptium\\jdk-17*\\bin\\java.exe",
+                r"C:\\Program Files\\Java\\jdk*\\bin\\java.exe",
+                r"C:\\Program Files\\Microsoft\\jdk*\\bin\\java.exe",
+            ]
+            # Expand globs
+            expanded: List[str] = []
+            import glob as _glob
+            for pat in java_candidates:
+                if "*" in pat:
+                    expanded += _glob.glob(pat)
+                else:
+                    expanded.append(pat)
+            java_candidates = expanded
+        return resolve_executable("java.exe" if is_windows else "java", None, java_candidates)
+
+    def _find_git() -> Optional[str]:
+        git_candidates = []
+        if is_windows:
+            git_candidates = [
+                r"C:\\Program Files\\Git\\bin\\git.exe",
+                r"C:\\Program Files\\Git\\cmd\\git.exe",
+                r"C:\\Program Files (x86)\\Git\\bin\\git.exe",
+                r"C:\\Program Files (x86)\\Git\\cmd\\git.exe",
+            ]
+        return resolve_executable("git.exe" if is_windows else "git", None, git_candidates)
+
+    def _find_cloc() -> Optional[str]:
+        if not is_windows:
+            return resolve_executable("cloc", None)
         # Include common Chocolatey and WinGet shim locations
         cloc_candidates = [
             os.path.expandvars(r"%LOCALAPPDATA%\\Microsoft\\WinGet\\Links\\cloc.exe"),
             r"C:\\ProgramData\\chocolatey\\bin\\cloc.exe",
             r"C:\\Program Files\\cloc\\cloc.exe",
         ]
+        # cloc may be installed as 'cloc' (winget) or 'cloc.exe' (choco). Try both.
+        return resolve_executable("cloc", None, cloc_candidates) or resolve_executable("cloc.exe", None, cloc_candidates)
 
-    git_exe = resolve_executable("git.exe" if is_windows else "git", args.git_exe, git_candidates)
-    # cloc may be installed as 'cloc' (winget) or 'cloc.exe' (choco). Try both.
-    if is_windows:
-        cloc_exe = resolve_executable("cloc", args.cloc_exe, cloc_candidates)
-        if not cloc_exe:
-            cloc_exe = resolve_executable("cloc.exe", args.cloc_exe, cloc_candidates)
-    else:
-        cloc_exe = resolve_executable("cloc", args.cloc_exe, cloc_candidates)
-    java_exe = resolve_executable("java.exe" if is_windows else "java", args.java_exe, java_candidates)
+    # Explicit paths win; otherwise reuse what an earlier run (or shard) with this work_dir found
+    exe_cache = os.path.join(os.path.abspath(args.work_dir), EXE_CACHE_NAME)
+    git_exe = resolve_executable("git", args.git_exe) if args.git_exe else cached_exe_path(f"git|{os.name}", _find_git, exe_cache)
+    cloc_exe = resolve_executable("cloc", args.cloc_exe) if args.cloc_exe else cached_exe_path(f"cloc|{os.name}", _find_cloc, exe_cache)
+    java_exe = resolve_executable("java", args.java_exe) if args.java_exe else cached_exe_path(f"java|{os.name}", _find_java, exe_cache)
 
     if not git_exe:
         print("ERRO: git não encontrado no PATH. Informe --git_exe ou instale o Git for Windows.", file=sys.stderr)
         return 2
-    if not cloc_exe:
+    if not cloc_exe and not args.native_loc:
         print("AVISO: cloc não encontrado; pulando métricas de LOC. Você pode instalar com sprint2/scripts/setup_cloc.ps1 ou informar --cloc_exe.")
     if not java_exe:
         print("AVISO: java não encontrado; CK será pulado. Ajuste JAVA_HOME ou informe --java_exe.")
@@ -833,16 +1440,11 @@ def main() -> int:
     # Prepare work plan
     work_parent = os.path.abspath(args.work_dir)
     ensure_dir(work_parent)
-    selected: List[Tuple[int, str, str]] = []
-    for i, (name, url) in enumerate(iter_repos(args.csv, args.filter_regex)):
-        if i < args.start_at:
-            continue
-        # apply modulo sharding based on global index i
-        if ((i - args.start_at) % args.shard_mod) != args.shard_idx:
-            continue
-        if len(selected) >= args.max:
-            break
-        selected.append((i, name, url))
+    # Modulo sharding on the global index i: this shard owns start_at+shard_idx, then every
+    # shard_mod-th repo; islice's step skips the other shards' rows without testing each one
+    indexed = enumerate(iter_repos(args.csv, args.filter_regex))
+    mine = itertools.islice(indexed, args.start_at + args.shard_idx, None, args.shard_mod)
+    selected: List[Tuple[int, str, str]] = [(i, name, url) for i, (name, url) in itertools.islice(mine, max(0, args.max))]
 
     total = len(selected)
     if total == 0:
@@ -855,12 +1457,57 @@ def main() -> int:
     # Stash CK memory opts on function for easy access inside workers without changing many signatures
     process_one._ck_xms = args.ck_xms  # type: ignore[attr-defined]
     process_one._ck_xmx = args.ck_xmx  # type: ignore[attr-defined]
+    # Shared class-data archive for CK's JVMs, built once per jar (next to the summaries)
+    ck_cds: Optional[str] = None
+    if args.ck_cds and java_exe and not args.skip_ck:
+        ensure_dir(args.out_dir)
+        ck_cds = build_ck_archive(ck_jar, java_exe, os.path.abspath(os.path.join(args.out_dir, ".ck.jsa")))
+        print(f"CK AppCDS: {ck_cds or 'indisponível (requer JDK 13+); seguindo sem'}")
+    process_one._ck_cds = ck_cds  # type: ignore[attr-defined]
+    # Result cache keyed by (repo, remote HEAD sha)
+    cache_path = os.path.join(args.out_dir, ".cache.sqlite") if args.cache else None
+    if cache_path:
+        ensure_dir(args.out_dir)
+    process_one._cache = cache_path  # type: ignore[attr-defined]
     # Toggle extended cloc behavior
     run_cloc_tree._extended = args.cloc_extended  # type: ignore[attr-defined]
+    # Let cloc fork over its share of the cores when the build supports it
+    cloc_processes = (os.cpu_count() or 1) // max(1, args.workers)
+    if cloc_processes < 2 or not cloc_exe or args.native_loc or args.skip_cloc or not cloc_parallel_ok(cloc_exe):
+        cloc_processes = 0
+    run_cloc_tree._processes = cloc_processes  # type: ignore[attr-defined]
+    # Toggle in-process Java LOC counting (no cloc subprocess)
+    run_cloc_tree._native = args.native_loc  # type: ignore[attr-defined]
+    # Toggle Java-only sparse clones
+    git_shallow_clone._java_sparse = args.java_sparse  # type: ignore[attr-defined]
     if args.workers <= 1:
         for idx, name, url in selected:
             ok = process_one(idx, name, url, work_parent, cloc_out, ck_out, git_exe, cloc_exe, java_exe, ck_jar, skip_cloc=args.skip_cloc, skip_ck=args.skip_ck, keep_temp=args.keep_temp)
             processed += 1 if ok else 0
+    elif args.processes:
+        init_args = (args.ck_xms, args.ck_xmx, ck_cds, args.cloc_extended, cloc_processes, args.java_sparse, args.native_loc, cache_path, work_parent)
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=init_args) as ex:
+            futures = [
+                ex.submit(_process_one_collect, idx, name, url, work_parent, cloc_out, ck_out, git_exe, cloc_exe, java_exe, ck_jar, args.skip_cloc, args.skip_ck, args.keep_temp)
+                for idx, name, url in selected
+            ]
+            for fut in as_completed(futures):
+                try:
+                    ok, rows = fut.result()
+                    for path, fields, row in rows:
+                        append_row(path, fields, row)
+                    processed += 1 if ok else 0
+                except Exception as e:
+                    print(f"[WORKER FAIL] {e}")
+        # Pool workers exit without atexit hooks: finish their pending deletes and
+        # drop their (now empty) private dirs here
+        for entry in os.scandir(work_parent):
+            if entry.name.startswith("w-") and entry.is_dir():
+                safe_rmtree(os.path.join(entry.path, ".trash"))
+                try:
+                    os.rmdir(entry.path)
+                except OSError:
+                    pass  # not empty (--keep_temp or leftovers): keep for inspection
     else:
         with ThreadPoolExecutor(max_workers=max(1, args.workers)) as ex:
             futures = [
@@ -2,6 +2,9 @@
 import os
 import pandas as pd
 
+# Parquet sibling (written by analyze_rqs.py) preferred; only the columns below are loaded
+from analyze_rqs import read_table
+
 BASE = os.path.join('sprint2', 'data')
 PROC = os.path.join(BASE, 'processed')
 
@@ -9,9 +12,21 @@ analysis_csv = os.path.join(PROC, 'analysis_summary.csv')
 corr_csv = os.path.join(PROC, 'correlations.csv')
 plots_dir = os.path.join(PROC, 'plots')
 
+
+def table_exists(path):
+    # read_table accepts either the CSV or its Parquet sibling
+    return os.path.isfile(path) or os.path.isfile(os.path.splitext(path)[0] + '.parquet')
+
+SUMMARY_DTYPES = {c: 'float64' for c in ['stars','releases','age_years','files','code','comment','n_classes','cbo_median','dit_median','lcom_median']}
+CORR_DTYPES = {
+    'process': 'string', 'x': 'string', 'y': 'string',
+    'spearman_r': 'float64', 'spearman_p': 'float64',
+    'pearson_r': 'float64', 'pearson_p': 'float64', 'n': 'Int64',
+}
+
 print('=== analysis_summary.csv ===')
-if os.path.isfile(analysis_csv):
-    df = pd.read_csv(analysis_csv)
+if table_exists(analysis_csv):
+    df = read_table(analysis_csv, SUMMARY_DTYPES)
     print('Rows:', len(df))
     cols = [c for c in ['stars','releases','age_years','files','code','comment','n_classes','cbo_median','dit_median','lcom_median'] if c in df.columns]
     print('Columns present:', cols)
@@ -22,8 +37,8 @@ else:
     print('File not found:', analysis_csv)
 
 print('\n=== correlations.csv ===')
-if os.path.isfile(corr_csv):
-    c = pd.read_csv(corr_csv)
+if table_exists(corr_csv):
+    c = read_table(corr_csv, CORR_DTYPES)
     print('Rows:', len(c))
     c_sp = c.dropna(subset=['spearman_r','spearman_p'])
     c_pe = c.dropna(subset=['pearson_r','pearson_p'])
@@ -27,16 +27,24 @@ Dependencies: Java 11+, CK JAR built via sprint2/scripts/setup_ck.ps1
 """
 import os
 import sys
+import functools
+import itertools
 import shutil
 import subprocess
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import List, Optional, Tuple
 
+from process_streaming import _has_java, build_ck_archive, resolve_executable
+
+# class.csv header of CK 0.7.x (only cbo/dit/lcom are read downstream)
+CK_CLASS_HEADER = "file,class,type,cbo,cboModified,fanin,fanout,wmc,dit,noc,rfc,lcom,lcom*,tcc,lcc"
+
 
 def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
+@functools.lru_cache(maxsize=4)
 def find_ck_jar(explicit_path: Optional[str]) -> str:
     if explicit_path:
         if os.path.isfile(explicit_path):
@@ -67,7 +75,7 @@ def list_git_repos(repos_dir: str) -> List[Tuple[str, str, str]]:
     return out
 
 
-def run_ck_one(ck_jar: str, owner: str, repo: str, repo_path: str, out_dir: str, extra_args: Optional[List[str]] = None) -> Tuple[str, bool, str]:
+def run_ck_one(ck_jar: str, owner: str, repo: str, repo_path: str, out_dir: str, extra_args: Optional[List[str]] = None, jvm_opts: Optional[List[str]] = None, git_exe: Optional[str] = None) -> Tuple[str, bool, str]:
     name = f"{owner}/{repo}"
     repo_out = os.path.join(out_dir, f"{owner}__{repo}")
     ensure_dir(repo_out)
@@ -77,9 +85,19 @@ def run_ck_one(ck_jar: str, owner: str, repo: str, repo_path: str, out_dir: str,
     if os.path.isfile(class_csv) and os.path.getsize(class_csv) > 0:
         return name, True, "already"
 
+    # No Java sources: CK has nothing to measure, don't pay for a JVM start. Leave the
+    # header-only class.csv CK itself would write, so summarize_ck still emits the
+    # repo's n_classes=0 row (and check_missing doesn't report it as missing).
+    # Without git the index can't be read, so CK decides
+    if git_exe and not _has_java(repo_path, git_exe):
+        with open(class_csv, "w", encoding="utf-8", newline="") as f:
+            f.write(CK_CLASS_HEADER + "\n")
+        return name, True, "skip_no_java"
+
     # Build command. CK usually supports: java -jar ck.jar <path> true 0 false
     cmd = [
         "java",
+        *(jvm_opts or []),
         "-jar",
         ck_jar,
         repo_path,
@@ -133,6 +151,7 @@ def main() -> int:
     p.add_argument("--ck_jar", type=str, default=None, help="Path to CK JAR; auto-detect if omitted")
     p.add_argument("--workers", type=int, default=4)
     p.add_argument("--extra_args", nargs="*", help="Extra args to append to CK command, if needed")
+    p.add_argument("--ck_cds", action="store_true", help="Build an AppCDS archive once (JDK 13+) and share it across CK JVMs")
     args = p.parse_args()
 
     try:
@@ -146,22 +165,49 @@ def main() -> int:
     print(f"Repos encontrados: {len(repos)}")
     ensure_dir(args.out_dir)
 
+    jvm_opts: List[str] = []
+    if args.workers > 1:
+        # Each JVM otherwise sizes its GC/JIT thread pools for the whole machine; with
+        # N concurrent JVMs that oversubscribes the cores, so give each its fair share
+        jvm_opts.append(f"-XX:ActiveProcessorCount={max(1, (os.cpu_count() or 1) // args.workers)}")
+    if args.ck_cds:
+        java_exe = shutil.which("java")
+        archive = build_ck_archive(ck_jar, java_exe, os.path.abspath(os.path.join(args.out_dir, ".ck.jsa"))) if java_exe else None
+        print(f"CK AppCDS: {archive or 'indisponível (requer JDK 13+); seguindo sem'}")
+        if archive:
+            jvm_opts += ["-Xshare:auto", f"-XX:SharedArchiveFile={archive}"]
+
+    # Resolved once; repos without tracked .java files are skipped without starting a JVM
+    git_exe = resolve_executable("git", None)
+    if not git_exe:
+        print("AVISO: git não encontrado; CK roda mesmo em repositórios sem .java.")
+
     ok = skipped = fail = 0
     failures: List[Tuple[str, str]] = []
 
     with ThreadPoolExecutor(max_workers=args.workers) as pool:
-        futs = [pool.submit(run_ck_one, ck_jar, owner, repo, path, args.out_dir, args.extra_args) for owner, repo, path in repos]
-        for fut in as_completed(futs):
-            name, success, msg = fut.result()
-            if success and msg == "already":
-                skipped += 1
-            elif success:
-                ok += 1
-                print(f"[CK] {name} -> {msg}")
-            else:
-                fail += 1
-                failures.append((name, msg))
-                print(f"[CK] {name} -> FAIL: {msg}")
+        # Submit lazily: only a small window of futures is alive at a time, refilled as each one finishes
+        todo = iter(repos)
+
+        def submit_next(n: int) -> set:
+            return {pool.submit(run_ck_one, ck_jar, owner, repo, path, args.out_dir, args.extra_args, jvm_opts, git_exe)
+                    for owner, repo, path in itertools.islice(todo, n)}
+
+        pending = submit_next(2 * max(1, args.workers))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            pending |= submit_next(len(done))
+            for fut in done:
+                name, success, msg = fut.result()
+                if success and msg in ("already", "skip_no_java"):
+                    skipped += 1
+                elif success:
+                    ok += 1
+                    print(f"[CK] {name} -> {msg}")
+                else:
+                    fail += 1
+                    failures.append((name, msg))
+                    print(f"[CK] {name} -> FAIL: {msg}")
 
     print(f"CK OK: {ok}, Skipped: {skipped}, Failed: {fail}")
     if failures:
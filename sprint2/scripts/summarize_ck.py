@@ -19,93 +19,147 @@ Note: Different CK versions may vary column headers. We try common variants:
   - LCOM: 'lcom' or 'lcom*' (prefer 'lcom')
 """
 import os
+import stat
 import sys
 import csv
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Tuple
 
-import math
+import numpy as np
+import pandas as pd
+
+try:
+    # Optional: typed, multithreaded CSV parse straight from a memory map
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = pacsv = None
 
 
 def list_class_csvs(raw_ck_dir: str) -> List[Tuple[str, str]]:
     files: List[Tuple[str, str]] = []
     if not os.path.isdir(raw_ck_dir):
         return files
-    for name in os.listdir(raw_ck_dir):
-        repo_dir = os.path.join(raw_ck_dir, name)
-        if not os.path.isdir(repo_dir):
-            continue
-        path = os.path.join(repo_dir, "class.csv")
-        if os.path.isfile(path) and os.path.getsize(path) > 0:
-            repo = name.replace("__", "/")
-            files.append((repo, path))
+    # scandir: the directory read already tells us which entries are dirs (no stat per entry)
+    with os.scandir(raw_ck_dir) as it:
+        for entry in it:
+            if not entry.is_dir():
+                continue
+            path = os.path.join(entry.path, "class.csv")
+            # One stat answers both "is a file" and "is non-empty"
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode) and st.st_size > 0:
+                repo = entry.name.replace("__", "/")
+                files.append((repo, path))
     return files
 
 
-def parse_float(v: str) -> Optional[float]:
-    try:
-        if v is None or v == "":
-            return None
-        return float(v)
-    except Exception:
-        return None
-
-
-def safe_stats(values: List[float]) -> Tuple[float, float, float]:
-    if not values:
-        return float("nan"), float("nan"), float("nan")
+def safe_stats(values: np.ndarray) -> Tuple[float, float, float]:
     n = len(values)
-    mean = sum(values) / n
-    # median
-    s = sorted(values)
+    if not n:
+        return float("nan"), float("nan"), float("nan")
+    a = np.asarray(values, dtype=np.float64)
+    mean = float(a.mean())
+    # median via quickselect (O(n)) on the middle one/two order statistics
+    k = n // 2
     if n % 2 == 1:
-        med = s[n // 2]
+        med = float(np.partition(a, k)[k])
     else:
-        med = 0.5 * (s[n // 2 - 1] + s[n // 2])
+        part = np.partition(a, (k - 1, k))
+        med = 0.5 * float(part[k - 1] + part[k])
     # sample std (n-1), fallback to 0 if n<2
-    if n < 2:
-        std = 0.0
-    else:
-        var = sum((x - mean) ** 2 for x in values) / (n - 1)
-        std = math.sqrt(max(var, 0.0))
+    std = float(a.std(ddof=1)) if n >= 2 else 0.0
     return mean, med, std
 
 
-def read_ck_class_csv(path: str) -> Dict[str, List[float]]:
-    cbo_vals: List[float] = []
-    dit_vals: List[float] = []
-    lcom_vals: List[float] = []
+# CK emits the same header for every repo of a batch: resolve each distinct header once
+_HEADER_CACHE: Dict[Tuple[str, ...], Dict[str, Optional[str]]] = {}
+
+
+def resolve_metric_columns(header: Tuple[str, ...]) -> Dict[str, Optional[str]]:
+    cols = _HEADER_CACHE.get(header)
+    if cols is not None:
+        return cols
+    fieldnames = [fn.lower() for fn in header]
+
+    # Map common variants
+    def col(*cands: str) -> Optional[str]:
+        for c in cands:
+            if c.lower() in fieldnames:
+                # Return the original case from the header
+                return header[fieldnames.index(c.lower())]
+        return None
+
+    cols = _HEADER_CACHE[header] = {
+        "cbo": col("cbo", "cbomodified"),
+        "dit": col("dit"),
+        "lcom": col("lcom", "lcom*", "lcomstar", "lcoms"),
+    }
+    return cols
+
+
+def read_ck_class_csv(path: str) -> Dict[str, np.ndarray]:
+    # Detect available columns once, from the header line only
     with open(path, encoding="utf-8", newline="") as f:
-        r = csv.DictReader(f)
-        # Detect available columns once
-        fieldnames = [fn.lower() for fn in (r.fieldnames or [])]
-        # Map common variants
-        def col(*cands: str) -> Optional[str]:
-            for c in cands:
-                if c.lower() in fieldnames:
-                    # Return the original case from r.fieldnames
-                    idx = fieldnames.index(c.lower())
-                    return r.fieldnames[idx]  # type: ignore[index]
-            return None
-
-        cbo_col = col("cbo", "cbomodified")
-        dit_col = col("dit")
-        lcom_col = col("lcom", "lcom*", "lcomstar", "lcoms")
-
-        for row in r:
-            if cbo_col:
-                v = parse_float(row.get(cbo_col, ""))
-                if v is not None:
-                    cbo_vals.append(v)
-            if dit_col:
-                v = parse_float(row.get(dit_col, ""))
-                if v is not None:
-                    dit_vals.append(v)
-            if lcom_col:
-                v = parse_float(row.get(lcom_col, ""))
-                if v is not None:
-                    lcom_vals.append(v)
-
-    return {"cbo": cbo_vals, "dit": dit_vals, "lcom": lcom_vals}
+        header = tuple(next(csv.reader(f), []))
+    cols = resolve_metric_columns(header)
+    used = [c for c in dict.fromkeys(cols.values()) if c]
+    if not used:
+        return {key: np.empty(0) for key in cols}
+    # Only the metric columns are parsed, straight to float64: by Arrow over a memory
+    # map of the file (no Python-side read buffer) or else by pandas' C reader.
+    # A non-numeric cell sends the file through the lenient per-cell conversion
+    data: Optional[Dict[str, np.ndarray]] = None
+    if pacsv is not None:
+        try:
+            with pa.memory_map(path, "r") as src:
+                tbl = pacsv.read_csv(src, convert_options=pacsv.ConvertOptions(
+                    include_columns=used, column_types={c: pa.float64() for c in used}))
+            data = {c: tbl.column(c).to_numpy() for c in used}
+        except pa.ArrowInvalid:
+            data = None
+    if data is None:
+        try:
+            df = pd.read_csv(path, usecols=used, dtype="float64", encoding="utf-8")
+        except ValueError:
+            raw = pd.read_csv(path, usecols=used, dtype=str, keep_default_na=False, encoding="utf-8")
+            df = raw.apply(lambda s: pd.to_numeric(s.str.strip(), errors="coerce"))
+        data = {c: df[c].to_numpy(dtype=np.float64) for c in used}
+
+    out: Dict[str, np.ndarray] = {}
+    for key, c in cols.items():
+        if c is None:
+            out[key] = np.empty(0)
+            continue
+        a = data[c]
+        # Empty/invalid cells are missing values, not classes
+        out[key] = a[~np.isnan(a)]
+    return out
+
+
+def _summarize_one(pair: Tuple[str, str]) -> Dict[str, str]:
+    repo, path = pair
+    metrics = read_ck_class_csv(path)
+    cbo_mean, cbo_med, cbo_std = safe_stats(metrics["cbo"])
+    dit_mean, dit_med, dit_std = safe_stats(metrics["dit"])
+    lcom_mean, lcom_med, lcom_std = safe_stats(metrics["lcom"])
+    n_classes = len(metrics["cbo"]) or len(metrics["dit"]) or len(metrics["lcom"])
+    return {
+        "repo": repo,
+        "n_classes": str(n_classes),
+        "cbo_mean": f"{cbo_mean:.6f}",
+        "cbo_median": f"{cbo_med:.6f}",
+        "cbo_std": f"{cbo_std:.6f}",
+        "dit_mean": f"{dit_mean:.6f}",
+        "dit_median": f"{dit_med:.6f}",
+        "dit_std": f"{dit_std:.6f}",
+        "lcom_mean": f"{lcom_mean:.6f}",
+        "lcom_median": f"{lcom_med:.6f}",
+        "lcom_std": f"{lcom_std:.6f}",
+    }
 
 
 def ensure_dir(path: str) -> None:
@@ -117,46 +171,41 @@ def main() -> int:
     p = argparse.ArgumentParser(description="Summarize CK class.csv per repo")
     p.add_argument("--raw_ck_dir", type=str, default="sprint2/data/raw_ck")
     p.add_argument("--out_csv", type=str, default="sprint2/data/processed/ck_summary.csv")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes used to parse class.csv files (1 = serial)")
+    p.add_argument("--append", action="store_true", help="Keep existing rows in out_csv and only summarize new repos")
     args = p.parse_args()
 
     pairs = list_class_csvs(args.raw_ck_dir)
     print(f"Repos com class.csv: {len(pairs)}")
 
-    rows: List[Dict[str, str]] = []
-    for repo, path in pairs:
-        metrics = read_ck_class_csv(path)
-        cbo_mean, cbo_med, cbo_std = safe_stats(metrics.get("cbo", []))
-        dit_mean, dit_med, dit_std = safe_stats(metrics.get("dit", []))
-        lcom_mean, lcom_med, lcom_std = safe_stats(metrics.get("lcom", []))
-        n_classes = len(metrics.get("cbo", [])) or len(metrics.get("dit", [])) or len(metrics.get("lcom", []))
-
-        rows.append({
-            "repo": repo,
-            "n_classes": str(n_classes),
-            "cbo_mean": f"{cbo_mean:.6f}",
-            "cbo_median": f"{cbo_med:.6f}",
-            "cbo_std": f"{cbo_std:.6f}",
-            "dit_mean": f"{dit_mean:.6f}",
-            "dit_median": f"{dit_med:.6f}",
-            "dit_std": f"{dit_std:.6f}",
-            "lcom_mean": f"{lcom_mean:.6f}",
-            "lcom_median": f"{lcom_med:.6f}",
-            "lcom_std": f"{lcom_std:.6f}",
-        })
+    fieldnames = [
+        "repo", "n_classes",
+        "cbo_mean", "cbo_median", "cbo_std",
+        "dit_mean", "dit_median", "dit_std",
+        "lcom_mean", "lcom_median", "lcom_std",
+    ]
+    # --append: keep the rows already in out_csv and only summarize repos missing from it
+    done: set = set()
+    if args.append and os.path.isfile(args.out_csv) and os.path.getsize(args.out_csv) > 0:
+        with open(args.out_csv, encoding="utf-8", newline="") as f:
+            done = {row["repo"] for row in csv.DictReader(f)}
+        pairs = [(repo, path) for repo, path in pairs if repo not in done]
+        print(f"Já resumidos: {len(done)}; novos: {len(pairs)}")
 
     ensure_dir(os.path.dirname(args.out_csv))
-    with open(args.out_csv, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(
-            f,
-            fieldnames=[
-                "repo", "n_classes",
-                "cbo_mean", "cbo_median", "cbo_std",
-                "dit_mean", "dit_median", "dit_std",
-                "lcom_mean", "lcom_median", "lcom_std",
-            ],
-        )
-        w.writeheader()
-        w.writerows(rows)
+    # Each row is written as soon as it is computed (no list of all repos in memory)
+    with open(args.out_csv, "a" if done else "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fieldnames)
+        if not done:
+            w.writeheader()
+        # Repos are independent: parse/summarize them across processes; map keeps
+        # the input order, so the CSV comes out the same as a serial run
+        workers = max(1, args.workers)
+        if workers == 1 or len(pairs) < 2:
+            w.writerows(map(_summarize_one, pairs))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                w.writerows(ex.map(_summarize_one, pairs, chunksize=8))
 
     print(f"Resumo CK salvo em {args.out_csv}")
     return 0
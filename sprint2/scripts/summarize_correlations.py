@@ -4,23 +4,32 @@ import numpy as np
 from pathlib import Path
 from textwrap import dedent
 
+# Parquet sibling (written by analyze_rqs.py) preferred; only the columns below are loaded
+from analyze_rqs import read_table
+
+CORR_DTYPES = {
+    'process': 'string', 'x': 'string', 'y': 'string',
+    'spearman_r': 'float64', 'spearman_p': 'float64',
+    'pearson_r': 'float64', 'pearson_p': 'float64', 'n': 'Int64',
+}
+
 def main():
     p = Path('sprint2/data/processed/correlations.csv')
-    if not p.exists():
+    if not p.exists() and not p.with_suffix('.parquet').exists():
         print(f'ERROR: {p} not found')
         return 2
-    df = pd.read_csv(p)
-    for col in ['spearman_r','spearman_p','pearson_r','pearson_p','n']:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-    # Filter to sufficiently large samples
-    sig_s = df[(df['n']>=50) & (df['spearman_p'].notna())].copy()
-    sig_s['abs_s'] = sig_s['spearman_r'].abs()
-    sig_p = df[(df['n']>=50) & (df['pearson_p'].notna())].copy()
-    sig_p['abs_p'] = sig_p['pearson_r'].abs()
+    # Typed read of the used columns replaces the to_numeric coercion pass
+    df = read_table(str(p), CORR_DTYPES)
+    # Filter to sufficiently large samples (missing n never qualifies)
+    big = (df['n'] >= 50).fillna(False).astype(bool)
+    sig_s = df[big & df['spearman_p'].notna()]
+    sig_p = df[big & df['pearson_p'].notna()]
+    abs_s = sig_s['spearman_r'].abs()
 
-    top_s = sig_s.sort_values('abs_s', ascending=False).head(8)
-    top_p = sig_p.sort_values('abs_p', ascending=False).head(8)
+    # Only the top rows are needed: nlargest on |r| picks them without a full sort
+    # or an extra column on the filtered frames
+    top_s = sig_s.loc[abs_s.nlargest(8).index]
+    top_p = sig_p.loc[sig_p['pearson_r'].abs().nlargest(8).index]
 
     print('=== Strongest correlations (Spearman, |r|, n>=50) ===')
     if not top_s.empty:
@@ -35,7 +44,7 @@ def main():
         print('No rows')
 
     if not sig_s.empty:
-        med = sig_s.groupby('x')['abs_s'].median().sort_values(ascending=False)
+        med = abs_s.groupby(sig_s['x']).median().sort_values(ascending=False)
         print('\nMedian |Spearman r| by process metric:')
         for k, v in med.items():
             print(f'  {k}: {v:.3f}')
@@ -45,13 +54,13 @@ def main():
     lines = ['# Correlations summary', '']
     lines.append('Top Spearman (|r|):')
     if not top_s.empty:
-        for _, r in top_s.iterrows():
-            lines.append(f"- {r['x']} vs {r['y']} (Spearman r={r['spearman_r']:.3f}, p={r['spearman_p']:.2e}, n={int(r['n'])})")
+        for x, y, r, pv, n in top_s[['x','y','spearman_r','spearman_p','n']].itertuples(index=False, name=None):
+            lines.append(f"- {x} vs {y} (Spearman r={r:.3f}, p={pv:.2e}, n={int(n)})")
     lines.append('')
     lines.append('Top Pearson (|r|):')
     if not top_p.empty:
-        for _, r in top_p.iterrows():
-            lines.append(f"- {r['x']} vs {r['y']} (Pearson r={r['pearson_r']:.3f}, p={r['pearson_p']:.2e}, n={int(r['n'])})")
+        for x, y, r, pv, n in top_p[['x','y','pearson_r','pearson_p','n']].itertuples(index=False, name=None):
+            lines.append(f"- {x} vs {y} (Pearson r={r:.3f}, p={pv:.2e}, n={int(n)})")
     lines.append('')
     if not sig_s.empty:
         lines.append('Median |Spearman r| by process metric:')
@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 import csv
+import heapq
+from math import isnan
 from pathlib import Path
 
 def to_float(s):
@@ -35,26 +37,28 @@ def main():
             row['pearson_p'] = to_float(row.get('pearson_p',''))
             row['n'] = int(to_float(row.get('n','0')) or 0)
             rows.append(row)
-    # Filters
-    sig_s = [r for r in rows if r['n']>=50 and not (r['spearman_p']!=r['spearman_p'])]  # p not NaN
-    for r in sig_s:
-        r['abs_s'] = abs(r['spearman_r'])
-    sig_p = [r for r in rows if r['n']>=50 and not (r['pearson_p']!=r['pearson_p'])]
-    for r in sig_p:
-        r['abs_p'] = abs(r['pearson_r'])
-    # Top 10
-    top_s = sorted(sig_s, key=lambda r: r['abs_s'], reverse=True)[:10]
-    top_p = sorted(sig_p, key=lambda r: r['abs_p'], reverse=True)[:10]
+    # Filters, |r| and the per-x Spearman groups in a single pass over the rows
+    sig_s, sig_p, byx = [], [], {}
+    for r in rows:
+        if r['n'] < 50:
+            continue
+        if not isnan(r['spearman_p']):
+            r['abs_s'] = abs(r['spearman_r'])
+            sig_s.append(r)
+            byx.setdefault(r['x'], []).append(r['abs_s'])
+        if not isnan(r['pearson_p']):
+            r['abs_p'] = abs(r['pearson_r'])
+            sig_p.append(r)
+    # Top 10 (heap selection; same result and tie order as sorted(..., reverse=True)[:10])
+    top_s = heapq.nlargest(10, sig_s, key=lambda r: r['abs_s'])
+    top_p = heapq.nlargest(10, sig_p, key=lambda r: r['abs_p'])
     print('=== Strongest Spearman (|r|, n>=50) ===')
     for r in top_s:
         print(f"- {r['x']} vs {r['y']} | r={r['spearman_r']:.3f}, p={r['spearman_p']:.2e}, n={r['n']}")
     print('\n=== Strongest Pearson (|r|, n>=50) ===')
     for r in top_p:
         print(f"- {r['x']} vs {r['y']} | r={r['pearson_r']:.3f}, p={r['pearson_p']:.2e}, n={r['n']}")
-    # Median abs Spearman by x
-    byx = {}
-    for r in sig_s:
-        byx.setdefault(r['x'], []).append(r['abs_s'])
+    # Median abs Spearman by x (groups collected in the filter pass)
     print('\nMedian |Spearman r| by process metric (x):')
     for k, vals in sorted(((k, median(v)) for k,v in byx.items()), key=lambda kv: kv[1], reverse=True):
         print(f"- {k}: {vals:.3f}")
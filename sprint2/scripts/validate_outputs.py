@@ -1,17 +1,41 @@
 #!/usr/bin/env python3
 import os
+import csv
 import argparse
 import pandas as pd
 import numpy as np
 
+try:
+    # Optional: Arrow's multithreaded CSV reader
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = pacsv = None
+
 BASE = os.path.join('sprint2','data')
 PROC = os.path.join(BASE,'processed')
 
 cloc_csv = os.path.join(PROC,'cloc_summary.csv')
 ck_csv = os.path.join(PROC,'ck_summary.csv')
 
-cloc = pd.read_csv(cloc_csv)
-ck = pd.read_csv(ck_csv)
+
+# Only the columns the checks and reports below look at are loaded
+CLOC_COLS = ['repo','files','code','comment']
+CK_COLS = ['repo','n_classes','cbo_median','dit_median','lcom_median']
+
+
+def read_csv(path, columns):
+    if pacsv is None:
+        return pd.read_csv(path, usecols=lambda c: c in columns)
+    # Plain to_pandas() gives the same dtypes read_csv would (int64, float64 once a column has gaps)
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        header = next(csv.reader(f), [])
+    opts = pacsv.ConvertOptions(column_types={'repo': pa.string()}, include_columns=[c for c in header if c in columns])
+    return pacsv.read_csv(path, convert_options=opts).to_pandas()
+
+
+cloc = read_csv(cloc_csv, CLOC_COLS)
+ck = read_csv(ck_csv, CK_COLS)
 
 # Normalize types
 for col in ['files','code','comment','blank']:
@@ -31,14 +55,24 @@ m = ck.merge(cloc, on='repo', how='left', suffixes=('_ck','_cloc'))
 
 n_total = len(m)
 
-n_ck_zero = int((m['n_classes'].fillna(0) <= 0).sum())
-n_cloc_missing = int(m['code'].isna().sum())
-n_cloc_zero = int((m['code'].fillna(0) == 0).sum())
+# Masks computed once on plain float arrays (NaN = missing) and reused by every
+# count/selection below, instead of a fillna copy per check
+nc = m['n_classes'].to_numpy(dtype='float64')
+code = m['code'].to_numpy(dtype='float64')
+ck_yes = nc > 0
+ck_none = np.isnan(nc) | (nc == 0)
+cloc_missing = np.isnan(code)
+cloc_zero = cloc_missing | (code == 0)
+cloc_yes = code > 0
+
+n_ck_zero = int((~ck_yes).sum())
+n_cloc_missing = int(cloc_missing.sum())
+n_cloc_zero = int(cloc_zero.sum())
 
-suspect_ck_yes_cloc_missing = m[(m['n_classes']>0) & (m['code'].isna())]
-suspect_ck_yes_cloc_zero = m[(m['n_classes']>0) & (m['code'].fillna(0)==0)]
+suspect_ck_yes_cloc_missing = m[ck_yes & cloc_missing]
+suspect_ck_yes_cloc_zero = m[ck_yes & cloc_zero]
 
-suspect_cloc_yes_ck_zero = m[(m['code'].fillna(0)>0) & (m['n_classes'].fillna(0)==0)]
+suspect_cloc_yes_ck_zero = m[cloc_yes & ck_none]
 
 # Outlier inspections
 high_lcom_med = m[m['lcom_median'] > 100]
@@ -72,7 +106,8 @@ print('lcom_median > 100:', len(high_lcom_med))
 print('cbo_median > 10:', len(high_cbo_med))
 print('dit_median > 4:', len(high_dit_med))
 print('\nTop 10 lcom_median:')
-print(m[['repo','lcom_median','n_classes','code']].sort_values('lcom_median', ascending=False).head(10).to_string(index=False))
+# Heap-based top-k instead of sorting the whole merged frame
+print(m.nlargest(10, 'lcom_median')[['repo','lcom_median','n_classes','code']].to_string(index=False))
 
 # Optionally write list for reprocessing
 if args.write_missing_list:
@@ -81,10 +116,9 @@ if args.write_missing_list:
     # Build CSV with headers: repo,url, optionally enriching URL from repos_list.csv
     df = suspect_ck_yes_cloc_zero[['repo']].copy()
     if args.enrich_from and os.path.isfile(args.enrich_from):
-        import csv as _csv
         url_map = {}
         with open(args.enrich_from, encoding='utf-8-sig', newline='') as fin:
-            r = _csv.DictReader(fin)
+            r = csv.DictReader(fin)
             for row in r:
                 name = (row.get('repo') or '').strip()
                 url = (row.get('url') or '').strip()